@@ -0,0 +1,159 @@
+import numpy as np
+
+
+def get_fifo_start_times(arrival_times, service_times, valid, n_servers):
+    """ finds when patients start service in a first-come-first-served queue with multiple servers
+    for many replications at once (Kiefer-Wolfowitz recursion on the times each server becomes free)
+    :param arrival_times: (numpy.array) of shape (replications, patients) with arrival times sorted in each row
+    :param service_times: (numpy.array) of shape (replications, patients) with service durations
+    :param valid: (numpy.array) of shape (replications, patients), False for patients that do not exist
+                  (these should come after the valid patients in each row)
+    :param n_servers: number of servers
+    :return: (numpy.array) of shape (replications, patients) with the time each patient starts service
+    """
+
+    n_reps, n_patients = arrival_times.shape
+    rows = np.arange(n_reps)
+    t_free = np.zeros((n_reps, n_servers))   # time each server becomes free
+    start_times = np.empty((n_reps, n_patients))
+
+    for j in range(n_patients):
+        # the patient is served by the server that becomes free first
+        server = t_free.argmin(axis=1)
+        t_server_free = t_free[rows, server]
+        start = np.maximum(arrival_times[:, j], t_server_free)
+        t_free[rows, server] = np.where(valid[:, j], start + service_times[:, j], t_server_free)
+        start_times[:, j] = start
+
+    return start_times
+
+
+class BatchOutputs:
+    # outputs of replications simulated by BatchUrgentCareModel (one element per replication)
+
+    def __init__(self, n_arrived, n_received_mh_consult, ave_time_in_system, ave_waiting_time, ave_mh_waiting_time):
+        """
+        :param n_arrived: (numpy.array) number of patients arrived
+        :param n_received_mh_consult: (numpy.array) number of patients who received MH consultation
+        :param ave_time_in_system: (numpy.array) average patient time in system
+        :param ave_waiting_time: (numpy.array) average patient waiting time
+        :param ave_mh_waiting_time: (numpy.array) average patient waiting time for MHS
+        """
+
+        self.nPatientsArrived = n_arrived
+        self.nPatientsServed = n_arrived     # all admitted patients are eventually served
+        self.nPatientsReceivedMHConsult = n_received_mh_consult
+        self.aveTimeInSystem = ave_time_in_system
+        self.aveWaitingTime = ave_waiting_time
+        self.aveMHWaitingTime = ave_mh_waiting_time
+
+
+class BatchUrgentCareModel:
+    # simulates many replications of the urgent care at once with numpy arrays
+    # (instead of processing one event at a time, waiting times are found by recursions on
+    # the times servers become free, which holds because patients are served first-come-first-served)
+
+    def __init__(self, parameters, n_replications, seed=0):
+        """
+        :param parameters: parameters of the urgent care model
+        :param n_replications: number of replications to simulate
+        :param seed: seed of the random number generator
+        """
+
+        self.params = parameters
+        self.nReplications = n_replications
+        self.seed = seed
+        self.outputs = None     # (BatchOutputs) outputs of replications
+
+    def simulate(self):
+        """ simulates all replications """
+
+        # arrivals are only sampled over one day (on later days, patients still being served
+        # from the day before would delay the patients arriving that day)
+        if self.params.nDays != 1:
+            raise ValueError('BatchUrgentCareModel only simulates one day (nDays = {}).'.format(self.params.nDays))
+        # waiting times are found by recursions that hold only if patients are served first-come-first-served
+        if self.params.priorityProbs is not None:
+            raise ValueError('BatchUrgentCareModel cannot simulate priority classes of patients.')
+
+        rng = np.random.default_rng(self.seed)
+        params = self.params
+        n_reps = self.nReplications
+
+        # arrival times (patients arriving after the urgent care closes are not admitted)
+        arrival_times = self._sample_arrival_times(rng=rng)
+        admitted = arrival_times <= params.hoursOpen
+        n_arrived = admitted.sum(axis=1)
+        n_patients = n_arrived.max()
+        arrival_times = arrival_times[:, :n_patients]
+        admitted = admitted[:, :n_patients]
+
+        # patient characteristics
+        exam_times = rng.exponential(scale=params.meanExamDuration, size=(n_reps, n_patients))
+        with_depression = admitted & (rng.random(size=(n_reps, n_patients)) < params.probDepression)
+        mh_consult_times = rng.exponential(scale=params.meanMHConsult, size=(n_reps, n_patients))
+
+        # PCP exams
+        exam_start_times = get_fifo_start_times(arrival_times=arrival_times,
+                                                service_times=exam_times,
+                                                valid=admitted,
+                                                n_servers=params.nPCPs)
+        exam_end_times = exam_start_times + exam_times
+
+        # patients with depression join the MH waiting room in the order they finish their exams
+        mh_arrival_times = np.where(with_depression, exam_end_times, np.inf)
+        order = mh_arrival_times.argsort(axis=1)
+        n_mh = with_depression.sum(axis=1)
+        n_mh_patients = n_mh.max()
+        order = order[:, :n_mh_patients]
+        mh_arrival_times = np.take_along_axis(mh_arrival_times, order, axis=1)
+        mh_consult_times = np.take_along_axis(mh_consult_times, order, axis=1)
+        mh_valid = np.arange(n_mh_patients) < n_mh[:, np.newaxis]
+        mh_arrival_times = np.where(mh_valid, mh_arrival_times, 0)
+
+        # MH consultations
+        mh_start_times = get_fifo_start_times(arrival_times=mh_arrival_times,
+                                              service_times=mh_consult_times,
+                                              valid=mh_valid,
+                                              n_servers=params.nMHPs)
+        mh_end_times = mh_start_times + mh_consult_times
+
+        # time in system (patients with depression leave after their MH consultation)
+        total_time_in_system = (np.where(admitted & ~with_depression, exam_end_times - arrival_times, 0).sum(axis=1)
+                                + np.where(mh_valid, mh_end_times, 0).sum(axis=1)
+                                - np.where(with_depression, arrival_times, 0).sum(axis=1))
+
+        total_waiting_time = np.where(admitted, exam_start_times - arrival_times, 0).sum(axis=1)
+        total_mh_waiting_time = np.where(mh_valid, mh_start_times - mh_arrival_times, 0).sum(axis=1)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.outputs = BatchOutputs(
+                n_arrived=n_arrived,
+                n_received_mh_consult=n_mh,
+                ave_time_in_system=total_time_in_system / n_arrived,
+                ave_waiting_time=total_waiting_time / n_arrived,
+                ave_mh_waiting_time=total_mh_waiting_time / n_mh)
+
+    def _sample_arrival_times(self, rng):
+        """
+        :param rng: random number generator
+        :return: (numpy.array) of shape (replications, patients) with arrival times where
+                 the last arrival of each replication is after the urgent care closes
+        """
+
+        mean_arrival_time = self.params.meanArrivalTime
+        hours_open = self.params.hoursOpen
+
+        # expected number of arrivals plus a margin
+        expected = hours_open / mean_arrival_time
+        n_patients = int(expected + 10 * np.sqrt(expected)) + 10
+
+        gaps = rng.exponential(scale=mean_arrival_time, size=(self.nReplications, n_patients))
+        arrival_times = gaps.cumsum(axis=1)
+
+        # sample more arrivals for replications that have not passed the closing time
+        while arrival_times[:, -1].min() <= hours_open:
+            gaps = rng.exponential(scale=mean_arrival_time, size=(self.nReplications, n_patients))
+            arrival_times = np.hstack([arrival_times, arrival_times[:, -1:] + gaps.cumsum(axis=1)])
+
+        return arrival_times
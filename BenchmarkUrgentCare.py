@@ -0,0 +1,676 @@
+import ast
+import gc
+import inspect
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import scipy.stats as stat
+from deampy.discrete_event_sim import SimulationCalendar
+
+import InputData as D
+import ModelEntities
+import ModelEvents
+import ModelParameters as P
+import UrgentCareModel as M
+from BatchUrgentCareModel import BatchUrgentCareModel
+from MultiUrgentCareModel import MultiUrgentCareModel, get_paired_differences
+from ParameterSweep import ParameterSweep, get_latin_hypercube_scenarios
+from Metamodel import Metamodel
+from ModelCalendar import UrgentCareCalendar
+from ModelNetwork import UrgentCareNetworkModel
+from StaffingOptimizer import StaffingOptimizer
+
+# loads of the benchmark suite (arguments of Parameters)
+LOADS = {
+    'light': {'mean_arrival_time': 1 / 30},
+    'base': {},
+    'overloaded': {'mean_arrival_time': 1 / 90},
+    '10x arrivals': {'mean_arrival_time': 1 / 600},
+}
+N_PCPS = (5, 10, 50)    # numbers of PCPs of the benchmark suite
+
+
+class _RemoveTraceCalls(ast.NodeTransformer):
+    # removes the 'if self.trace.on:' blocks from the source code of a module
+
+    def visit_If(self, node):
+        self.generic_visit(node)
+        if ast.unparse(node.test) == 'self.trace.on':
+            return ast.Pass()
+        return node
+
+
+def get_urgent_care_without_trace_calls():
+    """ :returns: the UrgentCare class compiled from ModelEntities.py with all trace calls removed """
+
+    with open(ModelEntities.__file__) as file:
+        tree = _RemoveTraceCalls().visit(ast.parse(file.read()))
+
+    namespace = {}
+    exec(compile(ast.fix_missing_locations(tree), ModelEntities.__file__, 'exec'), namespace)
+    return namespace['UrgentCare']
+
+
+def get_class_with_dict(cls):
+    """
+    :param cls: a class with __slots__ (e.g. Patient or Arrival)
+    :return: a class with the same methods as cls but without __slots__, so its objects carry a __dict__
+             (to measure the memory saved by __slots__)
+    """
+
+    namespace = {name: value for name, value in vars(cls).items() if inspect.isfunction(value)}
+    return type(cls.__name__ + 'WithDict', (), namespace)
+
+
+def measure_allocation(create, n_objects):
+    """
+    :param create: function that receives an integer i and returns a new object
+    :param n_objects: number of objects to create
+    :return: (tuple) of bytes per object and seconds to allocate each object
+    """
+
+    # memory (traced separately since tracemalloc slows down allocations)
+    tracemalloc.start()
+    objects = [create(i) for i in range(n_objects)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+
+    # time
+    start = time.perf_counter()
+    objects = [create(i) for i in range(n_objects)]
+    elapsed = time.perf_counter() - start
+    del objects
+
+    return size / n_objects, elapsed / n_objects
+
+
+def benchmark_memory(n_objects=100000):
+    """ compares the memory and allocation time of patients and events with and without __slots__
+    :param n_objects: number of objects to create
+    :return: (dictionary) of (bytes per object, seconds per object) for each type of object
+    """
+
+    patient_with_dict = get_class_with_dict(ModelEntities.Patient)
+    arrival_with_dict = get_class_with_dict(ModelEvents.Arrival)
+    creates = {
+        'Patient': lambda i: ModelEntities.Patient(id=i, if_with_depression=False),
+        'Patient (no slots)': lambda i: patient_with_dict(id=i, if_with_depression=False),
+        'Arrival': lambda i: ModelEvents.Arrival(time=i, patient=None, urgent_care=None),
+        'Arrival (no slots)': lambda i: arrival_with_dict(time=i, patient=None, urgent_care=None),
+    }
+
+    results = {key: measure_allocation(create=create, n_objects=n_objects) for key, create in creates.items()}
+
+    print('Memory and allocation time ({} objects):'.format(n_objects))
+    for key, (size, elapsed) in results.items():
+        print('  {:20s} {:6.1f} bytes {:6.3f} us'.format(key, size, elapsed * 1e6))
+
+    return results
+
+
+class _HoldEvent(ModelEvents.SimulationEvent):
+    # event of the hold model: when processed, schedules another event a random time later
+    __slots__ = ('simCal', 'delays')
+
+    def __init__(self, time, priority, sim_cal, delays):
+        """
+        :param time: time of the event
+        :param priority: priority of the event
+        :param sim_cal: simulation calendar
+        :param delays: iterator of (delay, priority) of the next events
+        """
+        ModelEvents.SimulationEvent.__init__(self, time=time, priority=priority)
+        self.simCal = sim_cal
+        self.delays = delays
+
+    def process(self, rng=None):
+        delay, priority = next(self.delays, (None, None))
+        if delay is not None:
+            self.simCal.add_event(
+                _HoldEvent(time=self.simCal.time + delay, priority=priority, sim_cal=self.simCal, delays=self.delays))
+
+
+def benchmark_calendar(n_pending=1000, n_events=200000):
+    """ compares the events processed per second by deampy's SimulationCalendar and UrgentCareCalendar
+    using the hold model (each processed event schedules a new one, so the calendar size stays constant)
+    :param n_pending: number of events in the calendar
+    :param n_events: number of events to process
+    :return: (dictionary) events per second for each calendar
+    """
+
+    rng = np.random.default_rng(seed=1)
+    priorities = rng.integers(low=0, high=4, size=n_pending + n_events).tolist()
+    delays = rng.exponential(scale=1, size=n_pending + n_events).tolist()
+
+    results = {}
+    for name in ('deampy SimulationCalendar', 'UrgentCareCalendar'):
+        sim_cal = SimulationCalendar() if name.startswith('deampy') else UrgentCareCalendar()
+        next_events = zip(delays[n_pending:], priorities[n_pending:])
+        for i in range(n_pending):
+            sim_cal.add_event(_HoldEvent(time=delays[i], priority=priorities[i], sim_cal=sim_cal, delays=next_events))
+
+        start = time.perf_counter()
+        if name.startswith('deampy'):
+            while sim_cal.n_events() > 0:
+                sim_cal.get_next_event().process(rng=None)
+        else:
+            sim_cal.process_events(sim_duration=float('inf'), rng=None)
+        results[name] = (n_pending + n_events) / (time.perf_counter() - start)
+
+    print('Calendar (hold model with {} pending events):'.format(n_pending))
+    for key, value in results.items():
+        print('  {:26s} {:,.0f} events/s'.format(key, value))
+
+    return results
+
+
+def time_replications(n_replications, trace_on):
+    """
+    :param n_replications: number of replications to simulate
+    :param trace_on: set to True to trace replications
+    :return: (float) wall time (seconds) to simulate the replications
+    """
+
+    params = P.Parameters()
+
+    start = time.perf_counter()
+    for i in range(1, n_replications + 1):
+        model = M.UrgentCareModel(id=i, parameters=params, trace_on=trace_on)
+        model.simulate(sim_duration=D.SIM_DURATION)
+
+    return time.perf_counter() - start
+
+
+def benchmark_tracing(n_replications=20, n_repeats=5):
+    """ compares the run time with tracing on, tracing off, and all trace calls removed from the model
+    (the best of n_repeats is reported for each)
+    :param n_replications: number of replications to simulate in each repeat
+    :param n_repeats: number of repeats
+    :return: (dictionary) wall time (seconds) of each case
+    """
+
+    urgent_care_with_trace_calls = M.UrgentCare
+    urgent_care_without_trace_calls = get_urgent_care_without_trace_calls()
+
+    times = {'trace on': [], 'trace off': [], 'no trace calls': []}
+    for repeat in range(n_repeats):
+        times['trace on'].append(time_replications(n_replications=n_replications, trace_on=True))
+        times['trace off'].append(time_replications(n_replications=n_replications, trace_on=False))
+
+        M.UrgentCare = urgent_care_without_trace_calls
+        try:
+            times['no trace calls'].append(time_replications(n_replications=n_replications, trace_on=False))
+        finally:
+            M.UrgentCare = urgent_care_with_trace_calls
+
+    results = {key: min(value) for key, value in times.items()}
+
+    print('Tracing ({} replications, best of {}):'.format(n_replications, n_repeats))
+    for key, value in results.items():
+        print('  {:15s} {:.3f} s'.format(key, value))
+    print('  overhead of disabled tracing: {:.1%}'.format(
+        results['trace off'] / results['no trace calls'] - 1))
+
+    return results
+
+
+def benchmark_batch_engine(n_replications=200):
+    """ compares the throughput of BatchUrgentCareModel and UrgentCareModel and validates that their outputs
+    have the same distribution (two-sample Kolmogorov-Smirnov test on each output)
+    :param n_replications: number of replications to simulate with each engine
+    :return: (dictionary) with throughput of each engine (replications per second) and p-value of each test
+    """
+
+    params = P.Parameters()
+    outputs = ('aveTimeInSystem', 'aveWaitingTime', 'aveMHWaitingTime', 'nPatientsArrived')
+
+    # event-driven
+    event_outputs = {output: [] for output in outputs}
+    start = time.perf_counter()
+    for i in range(1, n_replications + 1):
+        model = M.UrgentCareModel(id=i, parameters=params, trace_on=False, keep_patient_records=False)
+        model.simulate(sim_duration=D.SIM_DURATION)
+        event_outputs['aveTimeInSystem'].append(model.simOutputs.get_ave_patient_time_in_system())
+        event_outputs['aveWaitingTime'].append(model.simOutputs.get_ave_patient_waiting_time())
+        event_outputs['aveMHWaitingTime'].append(model.simOutputs.get_ave_patient_mh_waiting_time())
+        event_outputs['nPatientsArrived'].append(model.simOutputs.nPatientsArrived)
+    event_time = time.perf_counter() - start
+
+    # batch
+    start = time.perf_counter()
+    batch_model = BatchUrgentCareModel(parameters=params, n_replications=n_replications, seed=1)
+    batch_model.simulate()
+    batch_time = time.perf_counter() - start
+
+    results = {'event-driven (replications/s)': n_replications / event_time,
+               'batch (replications/s)': n_replications / batch_time}
+
+    print('Batch engine ({} replications): {:.1f}x faster'.format(n_replications, event_time / batch_time))
+    for output in outputs:
+        batch_values = getattr(batch_model.outputs, output)
+        p_value = stat.ks_2samp(event_outputs[output], batch_values).pvalue
+        results[output + ' (KS p-value)'] = p_value
+        print('  {:18s} event-driven mean {:8.3f}  batch mean {:8.3f}  KS p-value {:.3f}'.format(
+            output, np.mean(event_outputs[output]), np.mean(batch_values), p_value))
+
+    return results
+
+
+def benchmark_network(n_sites=100, group_sizes=(4, 100), diversion_threshold=5, sim_duration=1000,
+                      n_processes=None):
+    """ measures the wall time to simulate a network of urgent cares where sites are linked through diversion
+    in rings of different sizes (only rings are simulated in parallel, so with one ring of all sites
+    the network is simulated serially regardless of the number of processes)
+    :param n_sites: number of urgent cares
+    :param group_sizes: numbers of sites in each ring
+    :param diversion_threshold: patients are diverted if at least this many patients are waiting for a PCP
+    :param sim_duration: duration of simulation (hours)
+    :param n_processes: number of worker processes (None to use all CPUs)
+    :return: (dictionary) wall time (seconds) for each group size
+    """
+
+    params = [P.Parameters(n_pcps=8 + i % 5, mean_arrival_time=1 / (50 + i % 20)) for i in range(n_sites)]
+
+    results = {}
+    print('Network of {} urgent cares:'.format(n_sites))
+    for group_size in group_sizes:
+        # each site can divert patients to its two neighbors in its ring
+        neighbors = {i: [group_size * (i // group_size) + (i + 1) % group_size,
+                         group_size * (i // group_size) + (i - 1) % group_size] for i in range(n_sites)}
+
+        model = UrgentCareNetworkModel(id=1, site_parameters=params, neighbors=neighbors,
+                                       diversion_threshold=diversion_threshold)
+        start = time.perf_counter()
+        model.simulate(sim_duration=sim_duration, n_processes=n_processes)
+        results[group_size] = time.perf_counter() - start
+
+        n_groups = math.ceil(n_sites / group_size)
+        print('  rings of {:3d} sites (independent groups: {:3d}): {:6.2f} s'.format(
+            group_size, n_groups, results[group_size]))
+
+    return results
+
+
+def benchmark_common_random_numbers(n_replications=100, n_pcps=(10, 11)):
+    """ compares the variance of the difference in average waiting time between two staffing levels
+    when replications are paired (common random numbers) and when they are independent
+    :param n_replications: number of replications of each scenario
+    :param n_pcps: (tuple) number of PCPs in the base and alternative scenarios
+    :return: (dictionary) variance of differences with and without common random numbers
+    """
+
+    base_params = P.Parameters(n_pcps=n_pcps[0])
+    other_params = P.Parameters(n_pcps=n_pcps[1])
+
+    ids = range(1, n_replications + 1)
+    base = MultiUrgentCareModel(ids=ids, parameters=base_params, keep_patient_records=False)
+    base.simulate(sim_duration=D.SIM_DURATION, n_processes=1)
+
+    # common random numbers (same ids)
+    other = MultiUrgentCareModel(ids=ids, parameters=other_params, keep_patient_records=False)
+    other.simulate(sim_duration=D.SIM_DURATION, n_processes=1)
+    crn_differences = get_paired_differences(base, other, attribute='aveWaitingTime')
+
+    # independent replications (different ids)
+    independent = MultiUrgentCareModel(ids=range(n_replications + 1, 2 * n_replications + 1),
+                                       parameters=other_params, keep_patient_records=False)
+    independent.simulate(sim_duration=D.SIM_DURATION, n_processes=1)
+    independent_differences = [other - base for base, other in zip(
+        base.get_outcomes(attribute='aveWaitingTime'), independent.get_outcomes(attribute='aveWaitingTime'))]
+
+    results = {'common random numbers': np.var(crn_differences, ddof=1),
+               'independent': np.var(independent_differences, ddof=1)}
+
+    print('Variance of the difference in average waiting time ({} vs. {} PCPs, {} replications):'.format(
+        n_pcps[0], n_pcps[1], n_replications))
+    for key, value in results.items():
+        print('  {:22s} {:.5f}'.format(key, value))
+    print('  replications needed with common random numbers: {:.1%}'.format(
+        results['common random numbers'] / results['independent']))
+
+    return results
+
+
+def benchmark_replication(params, trace_on, n_replications=3):
+    """ measures the performance of simulating replications of the urgent care model
+    :param params: parameters of the urgent care model
+    :param trace_on: set to True to trace replications
+    :param n_replications: number of replications
+    :return: (dictionary) with wall time per replication, events per second, peak memory (bytes),
+             memory blocks allocated by the end of a replication, and garbage collections per replication
+    """
+
+    # wall time and events per second
+    wall_times = []
+    n_events = 0
+    for i in range(1, n_replications + 1):
+        model = M.UrgentCareModel(id=i, parameters=params, trace_on=trace_on)
+        start = time.perf_counter()
+        model.simulate(sim_duration=D.SIM_DURATION)
+        wall_times.append(time.perf_counter() - start)
+        n_events += model.simCal.nEventsProcessed
+
+    # allocations (measured without tracemalloc)
+    n_collections = sum(stats['collections'] for stats in gc.get_stats())
+    n_blocks = sys.getallocatedblocks()
+    model = M.UrgentCareModel(id=1, parameters=params, trace_on=trace_on)
+    model.simulate(sim_duration=D.SIM_DURATION)
+    allocated_blocks = sys.getallocatedblocks() - n_blocks
+    gc_collections = sum(stats['collections'] for stats in gc.get_stats()) - n_collections
+    del model
+
+    # peak memory
+    tracemalloc.start()
+    model = M.UrgentCareModel(id=1, parameters=params, trace_on=trace_on)
+    model.simulate(sim_duration=D.SIM_DURATION)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del model
+
+    return {'wallTimePerReplication': sum(wall_times) / n_replications,
+            'eventsPerSecond': n_events / sum(wall_times),
+            'peakMemory': peak_memory,
+            'allocatedBlocks': allocated_blocks,
+            'gcCollections': gc_collections}
+
+
+def count_instances(classes, run):
+    """
+    :param classes: (list) of classes to count the instantiations of
+    :param run: a function without arguments to run while counting
+    :return: (int) number of objects of these classes created while running
+    """
+
+    counts = [0]
+    original_inits = {cls: cls.__dict__['__init__'] for cls in classes}
+
+    def counting(init):
+        def __init__(self, *args, **kwargs):
+            counts[0] += 1
+            init(self, *args, **kwargs)
+        return __init__
+
+    for cls, init in original_inits.items():
+        cls.__init__ = counting(init)
+    try:
+        run()
+    finally:
+        for cls, init in original_inits.items():
+            cls.__init__ = init
+
+    return counts[0]
+
+
+def benchmark_recycling(n_days=7, n_replications=3, n_repeats=5):
+    """ compares simulating several days of operation with and without recycling patients and events
+    (both are timed in each repeat and the best of n_repeats is reported)
+    :param n_days: number of days of operation
+    :param n_replications: number of replications to simulate in each repeat
+    :param n_repeats: number of repeats
+    :return: (dictionary) with wall time per replication, objects (patients and events) created per replication,
+             garbage collections per replication, and time spent in garbage collection per replication
+    """
+
+    params = P.Parameters(n_days=n_days, n_mhps=3)
+    classes = [ModelEntities.Patient, ModelEvents.Arrival, ModelEvents.EndOfExam, ModelEvents.EndOfMentalHealthConsult]
+    keys = {False: 'no recycling', True: 'recycling'}
+
+    def simulate(id, recycle_objects):
+        model = M.UrgentCareModel(id=id, parameters=params, trace_on=False, keep_patient_records=False,
+                                  sample_path_max_points=1000, recycle_objects=recycle_objects)
+        model.simulate(sim_duration=D.SIM_DURATION)
+
+    # time spent in garbage collection
+    gc_time = [0.0]
+    gc_start = [0.0]
+
+    def on_gc(phase, info):
+        if phase == 'start':
+            gc_start[0] = time.perf_counter()
+        else:
+            gc_time[0] += time.perf_counter() - gc_start[0]
+
+    wall_times = {key: [] for key in keys.values()}
+    n_collections = {key: 0 for key in keys.values()}
+    total_gc_time = {key: 0.0 for key in keys.values()}
+    gc.callbacks.append(on_gc)
+    try:
+        for repeat in range(n_repeats):
+            for recycle_objects, key in keys.items():
+                wall_time = 0
+                for i in range(1, n_replications + 1):
+                    # collections triggered by earlier replications are not counted
+                    gc.collect()
+                    collections = sum(stats['collections'] for stats in gc.get_stats())
+                    gc_time[0] = 0.0
+                    start = time.perf_counter()
+                    simulate(id=i, recycle_objects=recycle_objects)
+                    wall_time += time.perf_counter() - start
+                    total_gc_time[key] += gc_time[0]
+                    n_collections[key] += sum(stats['collections'] for stats in gc.get_stats()) - collections
+                wall_times[key].append(wall_time)
+    finally:
+        gc.callbacks.remove(on_gc)
+
+    n_runs = n_repeats * n_replications
+    results = {}
+    for recycle_objects, key in keys.items():
+        results[key] = {
+            'wallTimePerReplication': min(wall_times[key]) / n_replications,
+            'objectsCreated': count_instances(classes=classes,
+                                              run=lambda: simulate(id=1, recycle_objects=recycle_objects)),
+            'gcCollections': n_collections[key] / n_runs,
+            'gcTime': total_gc_time[key] / n_runs}
+
+    print('Simulating {} days ({} replications):'.format(n_days, n_replications))
+    for key, value in results.items():
+        print('  {:13s} {:8.4f} s/replication {:8,d} objects created {:6.1f} collections {:8.5f} s in gc'.format(
+            key, value['wallTimePerReplication'], value['objectsCreated'], value['gcCollections'], value['gcTime']))
+
+    return results
+
+
+def benchmark_arrival_stream(n_replications=5, n_repeats=5, mean_arrival_time=1 / 600):
+    """ compares scheduling one arrival event per patient with generating the arrivals of each day at once
+    (both are timed in each repeat and the best of n_repeats is reported)
+    :param n_replications: number of replications to simulate in each repeat
+    :param n_repeats: number of repeats
+    :param mean_arrival_time: mean time between arrivals (hours)
+    :return: (dictionary) with wall time per replication and events added to the calendar heap per replication
+    """
+
+    params = P.Parameters(mean_arrival_time=mean_arrival_time)
+    keys = {False: 'arrival events', True: 'arrival stream'}
+
+    wall_times = {key: [] for key in keys.values()}
+    n_added = {}
+    for repeat in range(n_repeats):
+        for arrival_stream, key in keys.items():
+            wall_time = 0
+            n_added[key] = 0
+            for i in range(1, n_replications + 1):
+                model = M.UrgentCareModel(id=i, parameters=params, trace_on=False, keep_patient_records=False,
+                                          arrival_stream=arrival_stream)
+                start = time.perf_counter()
+                model.simulate(sim_duration=D.SIM_DURATION)
+                wall_time += time.perf_counter() - start
+                n_added[key] += model.simCal._nAdded
+            wall_times[key].append(wall_time)
+
+    results = {key: {'wallTimePerReplication': min(wall_times[key]) / n_replications,
+                     'eventsAdded': n_added[key] / n_replications} for key in keys.values()}
+
+    print('Arrivals ({} replications, mean time between arrivals {:.4f} hours):'.format(
+        n_replications, mean_arrival_time))
+    for key, value in results.items():
+        print('  {:15s} {:8.4f} s/replication {:10,.0f} events added to the calendar'.format(
+            key, value['wallTimePerReplication'], value['eventsAdded']))
+
+    return results
+
+
+def benchmark_staffing_optimizer(target=0.05, outcome='aveWaitingTime', max_pcps=20, n_processes=1):
+    """ compares the replications the staffing optimizer needs with a grid over all staffing levels
+    (the grid simulates each level with the number of replications the optimizer needed for its hardest level)
+    :param target: the maximum acceptable expected value of the outcome
+    :param outcome: (string) name of a ReplicationSummary attribute ('aveWaitingTime' or 'p90WaitingTime')
+    :param max_pcps: maximum number of PCPs to consider
+    :param n_processes: number of worker processes
+    :return: (dictionary) with the minimum number of PCPs, and the replications of the optimizer and of the grid
+    """
+
+    optimizer = StaffingOptimizer(target=target, outcome=outcome, max_pcps=max_pcps)
+    start = time.perf_counter()
+    n_pcps = optimizer.optimize(sim_duration=D.SIM_DURATION, n_processes=n_processes)
+    elapsed = time.perf_counter() - start
+
+    n_levels = optimizer.maxPCPs - optimizer.minPCPs + 1
+    results = {'minimumPCPs': n_pcps,
+               'optimizerReplications': optimizer.get_n_replications(),
+               'gridReplications': n_levels * max(len(summaries)
+                                                  for summaries in optimizer.replicationSummaries.values()),
+               'wallTime': elapsed}
+
+    optimizer.print_summary()
+    print('  replications of a grid over {} levels: {}'.format(n_levels, results['gridReplications']))
+    print('  wall time: {:.2f} s'.format(elapsed))
+
+    return results
+
+
+def benchmark_metamodel(outcome='aveTimeInSystem', degree=3, max_standard_error=0.05, max_rounds=5,
+                        n_test_scenarios=8, n_test_replications=40, n_queries=1000):
+    """ builds a metamodel over the arrival rate, exam duration and probability of depression, measures the time
+    to answer a query, and compares its predictions with simulations of scenarios it was not fitted to
+    :param outcome: (string) name of a ReplicationSummary attribute
+    :param degree: degree of the polynomial
+    :param max_standard_error: the largest acceptable standard error of predictions
+    :param max_rounds: maximum number of rounds of refinement
+    :param n_test_scenarios: number of scenarios to test predictions at
+    :param n_test_replications: number of replications of each test scenario
+    :param n_queries: number of queries to time
+    :return: (dictionary) with the number of scenarios simulated, the seconds per query, and the standardized
+             errors of predictions at test scenarios (which should mostly be between -2 and 2)
+    """
+
+    ranges = {'mean_arrival_time': [1 / 60, 1 / 45],
+              'mean_exam_duration': [8 / 60, 11 / 60],
+              'prob_depression': [0.05, 0.2]}
+
+    metamodel = Metamodel(ranges=ranges, outcome=outcome, degree=degree)
+    metamodel.build(sim_duration=D.SIM_DURATION, max_standard_error=max_standard_error, max_rounds=max_rounds)
+
+    # time to answer a query
+    start = time.perf_counter()
+    for i in range(n_queries):
+        metamodel.predict(mean_arrival_time=1 / 55, mean_exam_duration=10 / 60, prob_depression=0.1)
+    seconds_per_query = (time.perf_counter() - start) / n_queries
+
+    # test scenarios (simulated with replication ids the metamodel did not use)
+    scenarios = get_latin_hypercube_scenarios(ranges=ranges, n_scenarios=n_test_scenarios, seed=1000)
+    sweep = ParameterSweep(scenarios=scenarios, n_replications=n_test_replications,
+                           common_random_numbers=False, first_id=metamodel.nextId)
+    sweep.simulate(sim_duration=D.SIM_DURATION)
+
+    print('Metamodel of {} ({} scenarios, {:.3f} ms per query):'.format(
+        outcome, len(metamodel.scenarios), seconds_per_query * 1e3))
+    z_scores = []
+    for scenario, summaries in zip(scenarios, sweep.replicationSummaries):
+        values = np.array([getattr(summary, outcome) for summary in summaries])
+        prediction, standard_error = metamodel.predict(**scenario)
+        simulation_standard_error = values.std(ddof=1) / np.sqrt(len(values))
+        z_scores.append(float((prediction - values.mean())
+                              / np.sqrt(standard_error ** 2 + simulation_standard_error ** 2)))
+        print('  predicted {:8.4f} +/- {:6.4f}  simulated {:8.4f} +/- {:6.4f}'.format(
+            prediction, standard_error, values.mean(), simulation_standard_error))
+
+    return {'nScenarios': len(metamodel.scenarios),
+            'secondsPerQuery': seconds_per_query,
+            'zScores': z_scores}
+
+
+def get_git_commit():
+    """ :returns: the hash of the current git commit (None if not available) """
+
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_suite(n_replications=3, directory='Benchmarks'):
+    """ benchmarks the urgent care model over loads, numbers of PCPs, and with trace on and off,
+    and writes the results into a json file named after the current git commit
+    :param n_replications: number of replications of each case
+    :param directory: directory (relative to the current root) where the json file should be located
+    :return: (string) name of the json file
+    """
+
+    commit = get_git_commit()
+    results = {'commit': commit,
+               'time': datetime.now().isoformat(timespec='seconds'),
+               'python': platform.python_version(),
+               'machine': platform.machine(),
+               'cases': []}
+
+    for load, load_args in LOADS.items():
+        for n_pcps in N_PCPS:
+            params = P.Parameters(n_pcps=n_pcps, **load_args)
+            for trace_on in (False, True):
+                case = {'load': load, 'nPCPs': n_pcps, 'traceOn': trace_on}
+                case.update(benchmark_replication(params=params, trace_on=trace_on, n_replications=n_replications))
+                results['cases'].append(case)
+                print('{:12s} {:3d} PCPs trace {:3s}: {:8.4f} s/replication {:10,.0f} events/s {:8.1f} MB'.format(
+                    load, n_pcps, 'on' if trace_on else 'off', case['wallTimePerReplication'],
+                    case['eventsPerSecond'], case['peakMemory'] / 1e6))
+
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    file_name = os.path.join(directory, 'benchmark-{}.json'.format(commit[:8] if commit else 'unknown'))
+    with open(file_name, 'w') as file:
+        json.dump(results, file, indent=2)
+
+    return file_name
+
+
+def compare_suites(file_name, other_file_name):
+    """ prints the ratio of wall time per replication and peak memory between two benchmark suite results
+    :param file_name: json file of the base results
+    :param other_file_name: json file of the results to compare with the base
+    """
+
+    with open(file_name) as file:
+        base = json.load(file)
+    with open(other_file_name) as file:
+        other = json.load(file)
+
+    other_cases = {(case['load'], case['nPCPs'], case['traceOn']): case for case in other['cases']}
+
+    print('{} vs. {} (ratios > 1 are slower or larger):'.format(other['commit'], base['commit']))
+    for case in base['cases']:
+        other_case = other_cases.get((case['load'], case['nPCPs'], case['traceOn']))
+        if other_case is None:
+            continue
+        print('{:12s} {:3d} PCPs trace {:3s}: time {:5.2f}  peak memory {:5.2f}'.format(
+            case['load'], case['nPCPs'], 'on' if case['traceOn'] else 'off',
+            other_case['wallTimePerReplication'] / case['wallTimePerReplication'],
+            other_case['peakMemory'] / case['peakMemory']))
+
+
+if __name__ == '__main__':
+    # python BenchmarkUrgentCare.py                      runs the benchmark suite
+    # python BenchmarkUrgentCare.py compare a.json b.json    compares the results of two runs of the suite
+    if len(sys.argv) == 4 and sys.argv[1] == 'compare':
+        compare_suites(file_name=sys.argv[2], other_file_name=sys.argv[3])
+    else:
+        print('Results written to', run_suite())
@@ -2,14 +2,21 @@
 # trace
 TRACE_ON = True        # Set to true to trace a simulation replication
 DECI = 5                # the decimal point to round the numbers to in the trace file
+TRACE_CATEGORIES = ['arrival', 'exam', 'mh', 'queue']   # categories of trace messages to record
 
 # simulation settings
 SIM_DURATION = 100000   # (hours) a large number to me sure the simulation will be terminated eventually but
                         #  the simulation continues as long as there is a patient in the urgent care.
 
 HOURS_OPEN = 20         # hours the urgent cares open
+N_DAYS = 1              # number of days the urgent care opens (it reopens at the start of each day)
+HOURS_PER_DAY = 24      # hours in a day
 N_PCP = 10                # number of primary-care physicians
+N_MHP = 1                 # number of mental health physicians
+ASSIGNMENT_POLICY = 'lowest-id'     # policy to assign idle physicians: 'lowest-id', 'round-robin', 'least-utilized'
 MEAN_ARRIVAL_TIME = 1/60       # mean patients inter-arrival time (hours)
 MEAN_EXAM_DURATION = 10/60       # mean of exam duration (hours)
 MEAN_MH_CONSULT = 20/60         # mean duration of mental health consultation
-PROB_DEPRESSION = 0.1               # probability that a patient is diagnosed with depression
\ No newline at end of file
+PROB_DEPRESSION = 0.1               # probability that a patient is diagnosed with depression
+PRIORITY_PROBS = None       # probability that a patient is in each priority class (e.g. triage level; class 0 is
+                            # served first), None to serve patients first-come-first-served
\ No newline at end of file
@@ -0,0 +1,228 @@
+import itertools
+import math
+
+import numpy as np
+
+from ParameterSweep import ParameterSweep, get_latin_hypercube_scenarios
+
+
+class PolynomialMetamodel:
+    # polynomial regression (least squares) of the mean of an outcome on model parameters
+    # (parameters are scaled to [-1, 1] over their ranges; the standard error of predictions is based on
+    # the residuals of the fit, so it reflects both simulation noise and the lack of fit of the polynomial)
+
+    def __init__(self, ranges, degree=2):
+        """
+        :param ranges: (dictionary) of [min, max] of parameters, where keys are arguments of Parameters
+                       (e.g. {'mean_arrival_time': [1/70, 1/50], 'prob_depression': [0.05, 0.2]})
+        :param degree: degree of the polynomial
+        """
+
+        self.ranges = ranges
+        self.names = list(ranges.keys())
+        self.degree = degree
+
+        # terms of the polynomial (tuples of indices of the parameters multiplied together)
+        self.terms = [term for d in range(degree + 1)
+                      for term in itertools.combinations_with_replacement(range(len(self.names)), d)]
+
+        self.coefficients = None    # coefficients of the terms
+        self.xtxInv = None          # inverse of X'X (to find the standard error of predictions)
+        self.residualVar = None     # variance of residuals
+        self.nObservations = 0      # number of scenarios the metamodel is fitted to
+
+    def get_features(self, scenarios):
+        """
+        :param scenarios: (list) of dictionaries of values of parameters
+        :return: (numpy.array) the values of the terms of the polynomial for each scenario (one row per scenario)
+        """
+
+        x = np.array([[scenario[name] for name in self.names] for scenario in scenarios], dtype=float)
+        low = np.array([self.ranges[name][0] for name in self.names], dtype=float)
+        high = np.array([self.ranges[name][1] for name in self.names], dtype=float)
+        x = 2 * (x - low) / (high - low) - 1
+
+        features = np.ones((len(scenarios), len(self.terms)))
+        for j, term in enumerate(self.terms):
+            for i in term:
+                features[:, j] *= x[:, i]
+        return features
+
+    def fit(self, scenarios, values):
+        """ fits the polynomial to the outcome of scenarios
+        :param scenarios: (list) of dictionaries of values of parameters
+        :param values: (list) the (mean) outcome of each scenario
+        """
+
+        if len(scenarios) <= len(self.terms):
+            raise ValueError('At least {} scenarios are needed to fit a polynomial with {} terms.'.format(
+                len(self.terms) + 1, len(self.terms)))
+
+        x = self.get_features(scenarios)
+        y = np.array(values, dtype=float)
+
+        self.coefficients = np.linalg.lstsq(x, y, rcond=None)[0]
+        self.xtxInv = np.linalg.pinv(x.T @ x)
+        residuals = y - x @ self.coefficients
+        self.residualVar = float(residuals @ residuals) / (len(y) - len(self.terms))
+        self.nObservations = len(y)
+
+    def predict(self, scenario):
+        """
+        :param scenario: (dictionary) of values of parameters
+        :return: (tuple) the predicted mean of the outcome and its standard error
+        """
+
+        predictions, standard_errors = self.predict_many(scenarios=[scenario])
+        return float(predictions[0]), float(standard_errors[0])
+
+    def predict_many(self, scenarios):
+        """
+        :param scenarios: (list) of dictionaries of values of parameters
+        :return: (tuple) of (numpy.array) predicted means of the outcome and (numpy.array) their standard errors
+        """
+
+        x = self.get_features(scenarios)
+        return x @ self.coefficients, self.get_standard_errors(features=x)
+
+    def get_standard_errors(self, features, xtx_inv=None):
+        """
+        :param features: (numpy.array) values of the terms of the polynomial (one row per scenario)
+        :param xtx_inv: inverse of X'X (None to use the inverse of the fitted design)
+        :return: (numpy.array) the standard error of predictions for each scenario
+        """
+
+        if xtx_inv is None:
+            xtx_inv = self.xtxInv
+        return np.sqrt(self.residualVar * np.einsum('ij,jk,ik->i', features, xtx_inv, features))
+
+
+class Metamodel:
+    # a surrogate of the urgent care model to answer what-if queries without simulating:
+    # scenarios from a Latin hypercube design are simulated with ParameterSweep and a polynomial is fitted
+    # to the mean outcome of each scenario; where the standard error of predictions is too large,
+    # new scenarios are simulated and the polynomial is refitted
+
+    def __init__(self, ranges, outcome='aveWaitingTime', degree=2, n_replications=10, seed=0):
+        """
+        :param ranges: (dictionary) of [min, max] of parameters, where keys are arguments of Parameters
+                       (parameters with integer bounds are sampled as integers)
+        :param outcome: (string) name of a ReplicationSummary attribute
+        :param degree: degree of the polynomial
+        :param n_replications: number of replications of each scenario
+        :param seed: seed to sample scenarios
+        """
+
+        self.ranges = ranges
+        self.outcome = outcome
+        self.nReplications = n_replications
+        self.seed = seed
+        self.model = PolynomialMetamodel(ranges=ranges, degree=degree)
+
+        self.scenarios = []     # scenarios simulated
+        self.values = []        # mean outcome of each scenario
+        self.nRounds = 0        # number of rounds of scenarios simulated
+        self.nextId = 1         # id of the next replication to simulate
+
+    def build(self, sim_duration, n_initial_scenarios=None, max_standard_error=None, n_scenarios_per_round=5,
+              max_rounds=10, n_candidates=1000, n_processes=None):
+        """ simulates an initial design and refines the metamodel until the standard error of predictions
+        is small enough over the parameter ranges (or the number of rounds runs out)
+        :param sim_duration: duration of simulation (hours)
+        :param n_initial_scenarios: number of scenarios of the initial design (None for twice the number of terms)
+        :param max_standard_error: the largest acceptable standard error of predictions (None not to refine)
+        :param n_scenarios_per_round: number of scenarios added in each round of refinement
+        :param max_rounds: maximum number of rounds of refinement
+        :param n_candidates: number of candidate scenarios to find where predictions are the least certain
+        :param n_processes: number of worker processes (None to use all CPUs and 1 to simulate serially)
+        """
+
+        if n_initial_scenarios is None:
+            n_initial_scenarios = 2 * len(self.model.terms)
+
+        self.add_scenarios(scenarios=get_latin_hypercube_scenarios(
+            ranges=self.ranges, n_scenarios=n_initial_scenarios, seed=self.seed),
+            sim_duration=sim_duration, n_processes=n_processes)
+
+        if max_standard_error is None:
+            return
+
+        for i in range(max_rounds):
+            if not self.refine(sim_duration=sim_duration, max_standard_error=max_standard_error,
+                               n_scenarios=n_scenarios_per_round, n_candidates=n_candidates,
+                               n_processes=n_processes):
+                break
+
+    def refine(self, sim_duration, max_standard_error, n_scenarios=5, n_candidates=1000, n_processes=None):
+        """ simulates new scenarios where the standard error of predictions is larger than max_standard_error
+        (scenarios are chosen one at a time where the standard error is the largest, accounting for the
+        scenarios already chosen, so new scenarios spread over the regions of high uncertainty)
+        :param n_scenarios: maximum number of scenarios to add
+        (see build for the description of other parameters)
+        :return: True if scenarios were added and False if the standard error is already small enough
+        """
+
+        candidates = get_latin_hypercube_scenarios(
+            ranges=self.ranges, n_scenarios=n_candidates, seed=self.seed + 1 + self.nRounds)
+        features = self.model.get_features(candidates)
+
+        # inverse of X'X after adding the chosen scenarios (updated with the Sherman-Morrison formula)
+        xtx_inv = self.model.xtxInv.copy()
+        chosen = []
+        for i in range(n_scenarios):
+            standard_errors = self.model.get_standard_errors(features=features, xtx_inv=xtx_inv)
+            j = int(np.argmax(standard_errors))
+            if standard_errors[j] <= max_standard_error:
+                break
+
+            chosen.append(candidates[j])
+            v = xtx_inv @ features[j]
+            xtx_inv -= np.outer(v, v) / (1 + features[j] @ v)
+
+        if len(chosen) == 0:
+            return False
+
+        self.add_scenarios(scenarios=chosen, sim_duration=sim_duration, n_processes=n_processes)
+        return True
+
+    def add_scenarios(self, scenarios, sim_duration, n_processes=None):
+        """ simulates scenarios and refits the metamodel
+        :param scenarios: (list) of dictionaries of arguments of Parameters
+        :param sim_duration: duration of simulation (hours)
+        :param n_processes: number of worker processes (None to use all CPUs and 1 to simulate serially)
+        """
+
+        # scenarios are simulated with different replication ids so that their errors are independent
+        # (with common random numbers, the error shared by all scenarios would not show in the residuals)
+        sweep = ParameterSweep(scenarios=scenarios, n_replications=self.nReplications,
+                               keep_patient_records=self.outcome == 'p90WaitingTime',
+                               common_random_numbers=False, first_id=self.nextId)
+        sweep.simulate(sim_duration=sim_duration, n_processes=n_processes)
+
+        for scenario, summaries in zip(scenarios, sweep.replicationSummaries):
+            values = [getattr(summary, self.outcome) for summary in summaries]
+            values = [value for value in values if not math.isnan(value)]
+            if len(values) > 0:
+                self.scenarios.append(scenario)
+                self.values.append(sum(values) / len(values))
+
+        self.nextId += len(scenarios) * self.nReplications
+        self.nRounds += 1
+        self.model.fit(scenarios=self.scenarios, values=self.values)
+
+    def predict(self, **parameters):
+        """
+        :param parameters: values of parameters (arguments of Parameters, e.g. mean_arrival_time=1/55)
+        :return: (tuple) the predicted mean of the outcome and its standard error
+        """
+
+        return self.model.predict(scenario=parameters)
+
+    def get_max_standard_error(self, n_candidates=1000):
+        """
+        :param n_candidates: number of scenarios to evaluate the standard error at
+        :return: the largest standard error of predictions over the parameter ranges
+        """
+
+        candidates = get_latin_hypercube_scenarios(ranges=self.ranges, n_scenarios=n_candidates, seed=self.seed)
+        return float(np.max(self.model.predict_many(scenarios=candidates)[1]))
@@ -0,0 +1,190 @@
+import heapq
+import math
+
+
+class UrgentCareCalendar:
+    # simulation calendar for the urgent care model (drop-in replacement for deampy's SimulationCalendar)
+    # events are stored in a binary heap keyed on (time, priority, insertion sequence) so that
+    # events with the same time and priority are processed in the order they were scheduled;
+    # events of an external source (e.g. a pre-generated stream of arrivals) are merged with
+    # the events of the heap without being added to it;
+    # bookkeeping events (e.g. the end of a batch) only record outputs, so they do not keep the simulation
+    # running: events are processed only while an event that is not a bookkeeping event is scheduled
+
+    def __init__(self):
+        """ create a simulation calendar """
+
+        self._q = []                    # heap of (time, priority, sequence number, event)
+        self._nAdded = 0                # number of events added (to break ties)
+        self._source = None             # external source of events (see set_external_source)
+        self.nBookkeepingEvents = 0     # number of scheduled bookkeeping events (see add_bookkeeping_event)
+        self.time = 0                   # current time
+        self.nEventsProcessed = 0       # number of events processed by process_events
+
+    def n_events(self):
+        """
+        :return: number of scheduled events (an external source with pending events counts as one event) """
+
+        if self._source is not None and self._source.time < math.inf:
+            return len(self._q) + 1
+        return len(self._q)
+
+    def n_model_events(self):
+        """
+        :return: number of scheduled events that are not bookkeeping events """
+
+        return self.n_events() - self.nBookkeepingEvents
+
+    def set_external_source(self, source):
+        """ merges the events of an external source with the events of this calendar
+        :param source: an object with attributes time (the time of its next event, math.inf if it has no
+                       pending event) and priority (of its events), and method process(rng) that processes
+                       its next event and updates time (None to remove the external source)
+        """
+
+        self._source = source
+
+    def add_event(self, event):
+        """ add a new event to the calendar
+        :param event: a simulation event to be added to the simulation calendar """
+
+        if event.time < self.time:
+            raise ValueError('An event with event time less than the current time cannot be added to the calendar.')
+
+        heapq.heappush(self._q, (event.time, event.priority, self._nAdded, event))
+        self._nAdded += 1
+
+    def add_bookkeeping_event(self, event):
+        """ add an event that only records outputs to the calendar (the simulation ends when only
+        bookkeeping events are left, so they do not move the end of the simulation)
+        :param event: a BookkeepingEvent (which tells the calendar when it is processed) """
+
+        self.add_event(event)
+        self.nBookkeepingEvents += 1
+
+    def peek_time(self):
+        """
+        :return: the time of the next event (without removing it from the calendar) """
+
+        if self._source is not None and self._if_source_next():
+            return self._source.time
+        return self._q[0][0]
+
+    def get_next_event(self):
+        """
+        :return: the next simulation event (and advances the current time to the time of this event)
+        (if the next event is from the external source, the source is returned and processing it
+        processes its next event) """
+
+        if self._source is not None and self._if_source_next():
+            self.time = self._source.time
+            return self._source
+
+        self.time, priority, sequence, next_event = heapq.heappop(self._q)
+        return next_event
+
+    def _if_source_next(self):
+        """ :returns: True if the next event is the next event of the external source
+        (events in the heap go first if they have the same time and priority) """
+
+        source = self._source
+        if source.time == math.inf:
+            return False
+        if not self._q:
+            return True
+        time, priority = self._q[0][0], self._q[0][1]
+        return source.time < time or (source.time == time and source.priority < priority)
+
+    def process_events(self, sim_duration, rng):
+        """ processes events while there is an event scheduled and the simulation time is less than
+        the simulation duration (the event that passes the simulation duration is still processed)
+        :param sim_duration: duration of simulation
+        :param rng: random streams to pass to events
+        """
+
+        if self._source is not None:
+            self._process_events_with_source(sim_duration=sim_duration, rng=rng)
+            return
+
+        q = self._q
+        heappop = heapq.heappop
+        n_processed = 0
+
+        while len(q) > self.nBookkeepingEvents and self.time <= sim_duration:
+            self.time, priority, sequence, next_event = heappop(q)
+            next_event.process(rng)
+            n_processed += 1
+
+        self.nEventsProcessed += n_processed
+
+    def _process_events_with_source(self, sim_duration, rng):
+        """ processes events as process_events does, merging the events of the heap with the events of
+        the external source (see process_events for the description of parameters) """
+
+        q = self._q
+        heappop = heapq.heappop
+        source = self._source
+        inf = math.inf
+        n_processed = 0
+
+        while self.time <= sim_duration:
+            source_time = source.time
+            if q and (q[0][0] < source_time or (q[0][0] == source_time and q[0][1] <= source.priority)):
+                if source_time == inf and len(q) == self.nBookkeepingEvents:
+                    break
+                self.time, priority, sequence, next_event = heappop(q)
+                next_event.process(rng)
+            elif source_time < inf:
+                self.time = source_time
+                source.process(rng)
+            else:
+                break
+            n_processed += 1
+
+        self.nEventsProcessed += n_processed
+
+    def process_events_until(self, sim_duration, rng, pause_time=math.inf, max_events=None):
+        """ processes events as process_events does, but pauses before the first event scheduled at or after
+        pause_time or after max_events events (process_events_until can then be called again to continue)
+        :param sim_duration: duration of simulation
+        :param rng: random streams to pass to events
+        :param pause_time: simulation time to pause at
+        :param max_events: maximum number of events to process (None for no maximum)
+        :return: True if the simulation is finished and False if it was paused
+        """
+
+        q = self._q
+        heappop = heapq.heappop
+        n_processed = 0
+        if max_events is None:
+            max_events = math.inf
+
+        if self._source is not None:
+            while self.n_model_events() > 0 and self.time <= sim_duration and self.peek_time() < pause_time \
+                    and n_processed < max_events:
+                self.get_next_event().process(rng)
+                n_processed += 1
+        else:
+            while len(q) > self.nBookkeepingEvents and self.time <= sim_duration and q[0][0] < pause_time and n_processed < max_events:
+                self.time, priority, sequence, next_event = heappop(q)
+                next_event.process(rng)
+                n_processed += 1
+
+        self.nEventsProcessed += n_processed
+
+        return self.n_model_events() == 0 or self.time > sim_duration
+
+    def clear_calendar(self):
+        """ deletes all scheduled events (and the external source) but keeps the current time """
+
+        self._q.clear()
+        self._source = None
+        self.nBookkeepingEvents = 0
+
+    def reset(self):
+        """ deletes all scheduled events (and the external source) and resets the current time to zero """
+
+        self.time = 0
+        self._q.clear()
+        self._source = None
+        self.nBookkeepingEvents = 0
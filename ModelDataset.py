@@ -0,0 +1,101 @@
+import os
+
+import numpy as np
+
+from ModelOutputs import PatientRecords
+
+# prevalence sample paths of SimOutputs stored in datasets
+SAMPLE_PATHS = ('nPatientsWaitingPCP', 'nPatientsWaitingMH', 'nPatientInSystem', 'nPCPBusy', 'nMHSBusy')
+
+
+class ReplicationDataset:
+    # columnar binary dataset of patient records and sample paths of many replications
+    # (one compressed .npz file per replication, so replications simulated in different processes
+    # can be added to the same dataset; columns are read without parsing text)
+
+    def __init__(self, directory):
+        """
+        :param directory: directory (relative to the current root) of the dataset
+        """
+
+        self.directory = directory
+
+    def write_replication(self, id, sim_outputs):
+        """ adds the outputs of a replication to this dataset (replacing the replication with the same id)
+        :param id: replication id
+        :param sim_outputs: (SimOutputs) outputs of the replication
+        """
+
+        arrays = {}
+
+        # patient records (only if they are kept)
+        if sim_outputs.patientRecords is not None:
+            for name, dtype in PatientRecords.COLUMNS:
+                arrays[name] = sim_outputs.patientRecords.get_column(name)
+
+        # times and values of sample paths
+        for name in SAMPLE_PATHS:
+            sample_path = getattr(sim_outputs, name)
+            arrays[name + '_times'] = np.array(sample_path.get_times(), dtype=np.float64)
+            arrays[name + '_values'] = np.array(sample_path.get_values(), dtype=np.int64)
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        # write to a temporary file first so that readers never see a partially written replication
+        file_name = self._get_file_name(id)
+        np.savez_compressed(file_name + '.tmp.npz', **arrays)
+        os.replace(file_name + '.tmp.npz', file_name)
+
+    def get_ids(self):
+        """ :returns: (list) sorted ids of replications in this dataset """
+
+        if not os.path.isdir(self.directory):
+            return []
+
+        ids = []
+        for file_name in os.listdir(self.directory):
+            if file_name.startswith('Replication') and file_name.endswith('.npz') \
+                    and not file_name.endswith('.tmp.npz'):
+                ids.append(int(file_name[len('Replication'):-len('.npz')]))
+        return sorted(ids)
+
+    def load_column(self, name, ids=None, return_ids=False):
+        """
+        :param name: name of a patient column (see PatientRecords.COLUMNS)
+        :param ids: (list) ids of replications to read (None to read all replications)
+        :param return_ids: set to True to also return the replication id of each value
+        :return: (numpy.array) values of this column across replications (concatenated in the order of ids),
+                 and if return_ids is True, (numpy.array) the replication id of each value
+        """
+
+        if ids is None:
+            ids = self.get_ids()
+
+        columns = []
+        for id in ids:
+            # only the requested column is decompressed
+            with np.load(self._get_file_name(id)) as data:
+                if name not in data.files:
+                    raise ValueError('Column ' + name + ' is not in replication ' + str(id) + '. '
+                                     'Set keep_patient_records = True to export patient records.')
+                columns.append(data[name])
+
+        dtype = dict(PatientRecords.COLUMNS).get(name, np.float64)
+        values = np.concatenate(columns) if len(columns) > 0 else np.empty(0, dtype=dtype)
+
+        if return_ids:
+            return values, np.repeat(np.array(ids, dtype=np.int64), [len(column) for column in columns])
+        return values
+
+    def load_sample_path(self, name, id):
+        """
+        :param name: name of a sample path (see SAMPLE_PATHS)
+        :param id: replication id
+        :return: (tuple) of (numpy.array) times and (numpy.array) values of this sample path
+        """
+
+        with np.load(self._get_file_name(id)) as data:
+            return data[name + '_times'], data[name + '_values']
+
+    def _get_file_name(self, id):
+        return os.path.join(self.directory, 'Replication' + str(id) + '.npz')
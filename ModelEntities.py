@@ -1,14 +1,36 @@
-from ModelEvents import Arrival, EndOfExam, EndOfMentalHealthConsult
+import math
+from operator import attrgetter
+
+from ModelEvents import Arrival, ArrivalStream, EndOfExam, EndOfMentalHealthConsult, CloseUrgentCare, OpenUrgentCare
+from ModelQueues import FIFOQueue, PriorityQueue
+from ModelServerPool import ServerPool
+from ModelTrace import ARRIVAL, EXAM, MH, QUEUE
 
 
 class Patient:
-    def __init__(self, id, if_with_depression):
+    __slots__ = ('id', 'ifWithDepression', 'examDuration', 'mhConsultDuration', 'priority', 'tArrived',
+                 'tJoinedPCPWaitingRoom', 'tLeftPCPWaitingRoom', 'tJoinedMHWaitingRoom', 'tLeftMHWaitingRoom')
+
+    def __init__(self, id, if_with_depression, exam_duration=None, mh_consult_duration=None, priority=0):
         """ create a patient
         :param id: (integer) patient ID
         :param if_with_depression: (bool) set to true if the patient has depression
+        :param exam_duration: duration of this patient's exam
+        :param mh_consult_duration: duration of this patient's mental health consultation (if with depression)
+        :param priority: (integer) priority class of this patient (e.g. triage level; class 0 is served first)
         """
+        self.reset(id=id, if_with_depression=if_with_depression,
+                   exam_duration=exam_duration, mh_consult_duration=mh_consult_duration, priority=priority)
+
+    def reset(self, id, if_with_depression, exam_duration=None, mh_consult_duration=None, priority=0):
+        """ resets this patient to a new patient (so that patient objects can be reused after departure)
+        (see __init__ for the description of parameters) """
         self.id = id
         self.ifWithDepression = if_with_depression
+        self.examDuration = exam_duration
+        self.mhConsultDuration = mh_consult_duration
+        self.priority = priority
+        self.tArrived = None
         self.tJoinedPCPWaitingRoom = None
         self.tLeftPCPWaitingRoom = None
         self.tJoinedMHWaitingRoom = None
@@ -19,12 +41,16 @@ class Patient:
 
 
 class PCPWaitingRoom:
-    def __init__(self, sim_out, trace):
+    def __init__(self, sim_out, trace, queue=None):
         """ create a waiting room
         :param sim_out: simulation output
         :param trace: simulation trace
+        :param queue: queue of patients waiting (FIFOQueue or PriorityQueue from ModelQueues),
+                      if not provided, patients are served first-come-first-served
         """
-        self.patientsWaiting = []   # list of patients in the waiting room
+        if queue is None:
+            queue = FIFOQueue()
+        self.patientsWaiting = queue   # queue of patients in the waiting room
         self.simOut = sim_out
         self.trace = trace
 
@@ -36,28 +62,31 @@ class PCPWaitingRoom:
         # update statistics for the patient who joins the waiting room
         self.simOut.collect_patient_joining_pcp_waiting_room(patient=patient)
 
-        # add the patient to the list of patients waiting
-        self.patientsWaiting.append(patient)
+        # add the patient to the queue of patients waiting
+        self.patientsWaiting.add(patient)
 
         # trace
-        self.trace.add_message(
-            str(patient) + ' joins the waiting room. Number waiting = ' + str(len(self.patientsWaiting)) + '.')
+        if self.trace.on:
+            self.trace.add_message(QUEUE, '{} joins the waiting room. Number waiting = {}.',
+                                   patient, len(self.patientsWaiting))
 
     def get_next_patient(self):
         """
         :returns: the next patient in line
         """
 
+        # pop the next patient in line
+        patient = self.patientsWaiting.pop()
+
         # update statistics for the patient who leaves the waiting room
-        self.simOut.collect_patient_leaving_pcp_waiting_room(patient=self.patientsWaiting[0])
+        self.simOut.collect_patient_leaving_pcp_waiting_room(patient=patient)
 
         # trace
-        self.trace.add_message(
-            str(self.patientsWaiting[0]) + ' leaves the waiting room. Number waiting = '
-            + str(len(self.patientsWaiting) - 1) + '.')
+        if self.trace.on:
+            self.trace.add_message(QUEUE, '{} leaves the waiting room. Number waiting = {}.',
+                                   patient, len(self.patientsWaiting))
 
-        # pop the patient
-        return self.patientsWaiting.pop(0)
+        return patient
 
     def get_num_patients_waiting(self):
         """
@@ -67,12 +96,16 @@ class PCPWaitingRoom:
 
 
 class MHWaitingRoom:
-    def __init__(self, sim_out, trace):
+    def __init__(self, sim_out, trace, queue=None):
         """ create a waiting room
         :param sim_out: simulation output
         :param trace: simulation trace
+        :param queue: queue of patients waiting (FIFOQueue or PriorityQueue from ModelQueues),
+                      if not provided, patients are served first-come-first-served
         """
-        self.patientsWaitingMH = []   # list of patients in the MH waiting room
+        if queue is None:
+            queue = FIFOQueue()
+        self.patientsWaitingMH = queue   # queue of patients in the MH waiting room
         self.simOut = sim_out
         self.trace = trace
 
@@ -84,28 +117,31 @@ class MHWaitingRoom:
         # update statistics for the patient who joins the waiting room
         self.simOut.collect_patient_joining_mh_waiting_room(patient=patient)
 
-        # add the patient to the list of patients waiting
-        self.patientsWaitingMH.append(patient)
+        # add the patient to the queue of patients waiting
+        self.patientsWaitingMH.add(patient)
 
         # trace
-        self.trace.add_message(
-            str(patient) + ' joins the MH waiting room. Number waiting = ' + str(len(self.patientsWaitingMH)) + '.')
+        if self.trace.on:
+            self.trace.add_message(QUEUE, '{} joins the MH waiting room. Number waiting = {}.',
+                                   patient, len(self.patientsWaitingMH))
 
     def get_next_patient(self):
         """
         :returns: the next patient in line
         """
 
+        # pop the next patient in line
+        patient = self.patientsWaitingMH.pop()
+
         # update statistics for the patient who leaves the waiting room
-        self.simOut.collect_patient_leaving_mh_waiting_room(patient=self.patientsWaitingMH[0])
+        self.simOut.collect_patient_leaving_mh_waiting_room(patient=patient)
 
         # trace
-        self.trace.add_message(
-            str(self.patientsWaitingMH[0]) + ' leaves the MH waiting room. Number waiting = '
-            + str(len(self.patientsWaitingMH) - 1) + '.')
+        if self.trace.on:
+            self.trace.add_message(QUEUE, '{} leaves the MH waiting room. Number waiting = {}.',
+                                   patient, len(self.patientsWaitingMH))
 
-        # pop the patient
-        return self.patientsWaitingMH.pop(0)
+        return patient
 
     def get_num_patients_waiting(self):
         """
@@ -115,37 +151,40 @@ class MHWaitingRoom:
 
 
 class Physician:
-    def __init__(self, id, service_time_dist, urgent_care, sim_cal, sim_out, trace):
+    def __init__(self, id, urgent_care, sim_cal, sim_out, trace):
         """ create a physician
         :param id: (integer) the physician ID
-        :param service_time_dist: distribution of service time
         :param urgent_care: urgent care
         :param sim_cal: simulation calendar
         :param sim_out: simulation output
         :param trace: simulation trace
         """
         self.id = id
-        self.serviceTimeDist = service_time_dist
         self.urgentCare = urgent_care
         self.simCal = sim_cal
         self.simOut = sim_out
         self.trace = trace
         self.isBusy = False
         self.patientBeingServed = None  # the patient who is being served
+        # event reused for the end of each service (None to create a new event for each service)
+        self.completionEvent = None
 
 
 class PCP(Physician):
-    def __init__(self, id, service_time_dist, urgent_care, sim_cal, sim_out, trace):
+    def __init__(self, id, urgent_care, sim_cal, sim_out, trace, recycle_event=False):
         """ create a primary care physician
         :param id: (integer) id
-        :param service_time_dist: distribution of service time
         :param urgent_care: urgent care
         :param sim_cal: simulation calendar
         :param sim_out: simulation output
         :param trace: simulation trace
+        :param recycle_event: set to True to reuse one event for the end of all exams
+                              (a PCP examines one patient at a time)
         """
-        Physician.__init__(self, id=id, service_time_dist=service_time_dist, urgent_care=urgent_care, sim_cal=sim_cal,
-                           sim_out=sim_out, trace=trace)
+        Physician.__init__(self, id=id, urgent_care=urgent_care, sim_cal=sim_cal, sim_out=sim_out, trace=trace)
+
+        if recycle_event:
+            self.completionEvent = EndOfExam(time=0, physician=self, urgent_care=urgent_care)
 
     def __str__(self):
         """ :returns (string) the PCP ID """
@@ -154,7 +193,7 @@ class PCP(Physician):
     def exam(self, patient, rng):
         """ starts examining on the patient
         :param patient: a patient
-        :param rng: random number generator
+        :param rng: random streams of this replication
         """
 
         # the physician is busy
@@ -162,18 +201,23 @@ class PCP(Physician):
         self.isBusy = True
 
         # trace
-        self.trace.add_message(str(patient) + ' starts service in ' + str(self))
+        if self.trace.on:
+            self.trace.add_message(EXAM, '{} starts service in {}', patient, self)
 
         # collect statistics
         self.simOut.collect_patient_starting_pcp_exam()
 
         # find the exam completion time (current time + service time)
-        exam_completion_time = self.simCal.time + self.serviceTimeDist.sample(rng=rng)
+        exam_completion_time = self.simCal.time + patient.examDuration
 
         # schedule the end of exam
-        self.simCal.add_event(
-            event=EndOfExam(time=exam_completion_time, physician=self, urgent_care=self.urgentCare)
-        )
+        if self.completionEvent is None:
+            self.simCal.add_event(
+                event=EndOfExam(time=exam_completion_time, physician=self, urgent_care=self.urgentCare)
+            )
+        else:
+            self.completionEvent.time = exam_completion_time
+            self.simCal.add_event(event=self.completionEvent)
 
     def remove_patient(self):
         """ :returns the patient that was being served by this physician"""
@@ -193,23 +237,27 @@ class PCP(Physician):
             self.simOut.collect_patient_departure(patient=returned_patient)
 
             # trace
-            self.trace.add_message(str(returned_patient) + ' leaves ' + str(self) + '.')
+            if self.trace.on:
+                self.trace.add_message(EXAM, '{} leaves {}.', returned_patient, self)
 
         return returned_patient
 
 
 class MHP(Physician):
-    def __init__(self, id, service_time_dist, urgent_care, sim_cal, sim_out, trace):
+    def __init__(self, id, urgent_care, sim_cal, sim_out, trace, recycle_event=False):
         """ create a mental health physician
         :param id: (integer) the room ID
-        :param service_time_dist: distribution of service time
         :param urgent_care: urgent care
         :param sim_cal: simulation calendar
         :param sim_out: simulation output
         :param trace: simulation trace
+        :param recycle_event: set to True to reuse one event for the end of all consultations
+                              (an MHP consults one patient at a time)
         """
-        Physician.__init__(self, id=id, service_time_dist=service_time_dist, urgent_care=urgent_care, sim_cal=sim_cal,
-                           sim_out=sim_out, trace=trace)
+        Physician.__init__(self, id=id, urgent_care=urgent_care, sim_cal=sim_cal, sim_out=sim_out, trace=trace)
+
+        if recycle_event:
+            self.completionEvent = EndOfMentalHealthConsult(time=0, consult_room=self, urgent_care=urgent_care)
 
     def __str__(self):
         """ :returns (string) the mental health physican id """
@@ -218,7 +266,7 @@ class MHP(Physician):
     def consult(self, patient, rng):
         """ starts mental health consultation for this patient
         :param patient: a patient
-        :param rng: random number generator
+        :param rng: random streams of this replication
         """
 
         # the room is busy
@@ -226,20 +274,25 @@ class MHP(Physician):
         self.isBusy = True
 
         # trace
-        self.trace.add_message(str(patient) + ' starts service in ' + str(self))
+        if self.trace.on:
+            self.trace.add_message(MH, '{} starts service in {}', patient, self)
 
         # collect statistics
         self.simOut.collect_patient_starting_mh_exam()
 
         # find the exam completion time (current time + service time)
-        exam_completion_time = self.simCal.time + self.serviceTimeDist.sample(rng=rng)
+        exam_completion_time = self.simCal.time + patient.mhConsultDuration
 
         # schedule the end of exam
-        self.simCal.add_event(
-            event=EndOfMentalHealthConsult(time=exam_completion_time,
-                                           consult_room=self,
-                                           urgent_care=self.urgentCare)
-        )
+        if self.completionEvent is None:
+            self.simCal.add_event(
+                event=EndOfMentalHealthConsult(time=exam_completion_time,
+                                               consult_room=self,
+                                               urgent_care=self.urgentCare)
+            )
+        else:
+            self.completionEvent.time = exam_completion_time
+            self.simCal.add_event(event=self.completionEvent)
 
     def remove_mh_patient(self):
         """ :returns the patient that was being served by mental health physician """
@@ -255,17 +308,22 @@ class MHP(Physician):
         self.simOut.collect_patient_departure(patient=returned_patient)
 
         # trace
-        self.trace.add_message(str(returned_patient) + ' leaves ' + str(self) + '.')
+        if self.trace.on:
+            self.trace.add_message(MH, '{} leaves {}.', returned_patient, self)
 
         return returned_patient
 
 
 class UrgentCare:
-    def __init__(self, id, parameters, sim_cal, sim_out, trace):
+    def __init__(self, id, parameters, sim_cal, sim_out, trace, recycle_objects=False, arrival_stream=False):
         """ creates an urgent care
         :param id: ID of this urgent care
         :param sim_cal: simulation calendar
         :parameters: parameters of this urgent care
+        :param recycle_objects: set to True to reuse one arrival event, one completion event per physician,
+                                and the patients who left (see SimOutputs.recycledPatients)
+        :param arrival_stream: set to True to generate the arrivals of each day at once and merge them with
+                               the simulation calendar as an external source (see ArrivalStream)
         """
 
         self.id = id                   # urgent care id
@@ -275,97 +333,226 @@ class UrgentCare:
         self.trace = trace
 
         self.ifOpen = True  # if the urgent care is open and admitting new patients
+        self.day = 0        # current day (starting from 0)
+        self.ifArrivalScheduled = True  # if the arrival of the next patient is in the calendar
+        self.nextPatientId = None       # id of the first patient of the next day
+
+        # event reused for all arrivals (None to create a new event for each arrival);
+        # at most one arrival is scheduled at a time
+        self.arrivalEvent = None
+        if recycle_objects:
+            self.arrivalEvent = Arrival(time=0, patient=None, urgent_care=self)
+
+        # stream of pre-generated arrivals (None to schedule one arrival event at a time)
+        self.arrivalStream = None
+        if arrival_stream:
+            self.arrivalStream = ArrivalStream(urgent_care=self)
+            self.simCal.set_external_source(source=self.arrivalStream)
 
         # waiting room
         self.waitingRoom = PCPWaitingRoom(sim_out=self.simOutputs,
-                                          trace=self.trace)
+                                          trace=self.trace,
+                                          queue=self.get_new_queue())
 
         # PCPs
         self.PCPs = []
         for i in range(0, self.params.nPCPs):
             self.PCPs.append(PCP(id=i,
-                                 service_time_dist=self.params.examTimeDist,
                                  urgent_care=self,
                                  sim_cal=self.simCal,
                                  sim_out=self.simOutputs,
-                                 trace=self.trace))
+                                 trace=self.trace,
+                                 recycle_event=recycle_objects))
+
+        # idle PCPs
+        self.idlePCPs = ServerPool(servers=self.PCPs,
+                                   sim_cal=self.simCal,
+                                   policy=self.params.assignmentPolicy)
 
         # waiting room for mental health consultation
         self.mhConsultWaitingRoom = MHWaitingRoom(sim_out=self.simOutputs,
-                                                  trace=self.trace)
+                                                  trace=self.trace,
+                                                  queue=self.get_new_queue())
+
+        # mental health physicians
+        self.MHPs = []
+        for i in range(0, self.params.nMHPs):
+            self.MHPs.append(MHP(id=i,
+                                 urgent_care=self,
+                                 sim_cal=self.simCal,
+                                 sim_out=self.simOutputs,
+                                 trace=self.trace,
+                                 recycle_event=recycle_objects))
+
+        # idle mental health physicians
+        self.idleMHPs = ServerPool(servers=self.MHPs,
+                                   sim_cal=self.simCal,
+                                   policy=self.params.assignmentPolicy)
 
-        # create the mental health consultation room
-        self.MHP = MHP(id=0,
-                       service_time_dist=self.params.mentalHealthConsultDist,
-                       urgent_care=self,
-                       sim_cal=self.simCal,
-                       sim_out=self.simOutputs,
-                       trace=self.trace)
+    def get_new_queue(self):
+        """ :returns: a queue for a waiting room (patients are served by priority class if patients have
+        priority classes, and first-come-first-served otherwise) """
+
+        if self.params.priorityProbs is None:
+            return FIFOQueue()
+        return PriorityQueue(get_priority=attrgetter('priority'))
 
     def process_new_patient(self, patient, rng):
         """ receives a new patient
         :param patient: the new patient
-        :param rng: random number generator
+        :param rng: random streams of this replication
         """
 
         # trace
-        self.trace.add_message(
-            'Processing arrival of ' + str(patient) + '.')
+        if self.trace.on:
+            self.trace.add_message(ARRIVAL, 'Processing arrival of {}.', patient)
 
         # do not admit the patient if the urgent care is closed
         if not self.ifOpen:
-            self.trace.add_message('Urgent care is closed. '+str(patient)+' does not get admitted.')
+            if self.trace.on:
+                self.trace.add_message(ARRIVAL, 'Urgent care is closed. {} does not get admitted.', patient)
+            # arrivals resume when the urgent care reopens (with this patient id)
+            self.ifArrivalScheduled = False
+            self.nextPatientId = patient.id
+            if self.arrivalStream is not None:
+                self.arrivalStream.clear()
             return
 
+        # admit the patient
+        self.admit_patient(patient=patient, rng=rng)
+
+        # schedule the arrival of the next patient
+        # (the stream of arrivals only needs to be extended if this patient was its last arrival,
+        # which happens when the urgent care reopened before this patient arrived)
+        if self.arrivalStream is None or self.arrivalStream.time == math.inf:
+            self.schedule_arrival(patient_id=patient.id + 1, rng=rng)
+
+    def admit_patient(self, patient, rng):
+        """ admits a patient who arrived at this urgent care (or was diverted to it)
+        :param patient: the patient
+        :param rng: random streams of this replication
+        """
+
         # collect statistics on new patient
         self.simOutputs.collect_patient_arrival(patient=patient)
 
-        # check if anyone is waiting
-        if self.waitingRoom.get_num_patients_waiting() > 0:
-            # if anyone is waiting, add the patient to the waiting room
+        # if anyone is waiting or no pcp is idle
+        if self.waitingRoom.get_num_patients_waiting() > 0 or self.idlePCPs.get_num_idle() == 0:
+            # add the patient to the waiting room
             self.waitingRoom.add_patient(patient=patient)
         else:
-            # find an idle physician
-            idle_pcp_found = False
-            for pcp in self.PCPs:
-                # if this pcp is busy
-                if not pcp.isBusy:
-                    # send the last patient to this pcp
-                    pcp.exam(patient=patient, rng=rng)
-                    idle_pcp_found = True
-                    # break the for loop
-                    break
-
-            # if no idle pcp was found
-            if not idle_pcp_found:
-                # add the patient to the waiting room
-                self.waitingRoom.add_patient(patient=patient)
+            # send the patient to an idle pcp
+            self.idlePCPs.acquire().exam(patient=patient, rng=rng)
 
-        # find the arrival time of the next patient (current time + time until next arrival)
-        next_arrival_time = self.simCal.time + self.params.arrivalTimeDist.sample(rng=rng)
+    def schedule_arrival(self, patient_id, rng):
+        """ schedules the arrival of the next patient
+        :param patient_id: (integer) ID of the next patient
+        :param rng: random streams of this replication
+        """
+
+        if self.arrivalStream is not None:
+            self.schedule_arrival_stream(patient_id=patient_id, rng=rng)
+            return
 
-        # find the depression status of the next patient
-        if_with_depression = False
-        if rng.random_sample() < self.params.probDepression:
-            if_with_depression = True
+        # find the arrival time of the next patient (current time + time until next arrival)
+        next_arrival_time = self.simCal.time + rng.arrivalTime.sample()
 
         # schedule the arrival of the next patient
-        self.simCal.add_event(
-            event=Arrival(
-                time=next_arrival_time,
-                patient=Patient(id=patient.id + 1, if_with_depression=if_with_depression),
-                urgent_care=self
+        if self.arrivalEvent is None:
+            self.simCal.add_event(
+                event=Arrival(
+                    time=next_arrival_time,
+                    patient=self.create_patient(id=patient_id, rng=rng),
+                    urgent_care=self
+                )
             )
-        )
+        else:
+            self.arrivalEvent.time = next_arrival_time
+            self.arrivalEvent.patient = self.create_patient(id=patient_id, rng=rng)
+            self.simCal.add_event(event=self.arrivalEvent)
+
+    def schedule_arrival_stream(self, patient_id, rng):
+        """ generates the arrivals of patients from now until the first arrival after the urgent care closes
+        (the same arrivals and patients as scheduling one arrival at a time, but drawn with vectorized calls)
+        :param patient_id: (integer) ID of the next patient
+        :param rng: random streams of this replication
+        """
+
+        # arrival times until the first arrival after closing (which is not admitted)
+        t_close = self.day * self.params.hoursPerDay + self.params.hoursOpen
+        times = rng.arrivalTime.sample_cumulative(start=self.simCal.time, end=t_close)
+        n_patients = len(times)
+
+        # depression status and durations of exam and mental health consultation of patients
+        if_with_depression = rng.depression.sample_array(n=n_patients).tolist()
+        exam_durations = rng.examTime.sample_array(n=n_patients).tolist()
+        mh_consult_durations = iter(rng.mhConsultTime.sample_array(n=sum(if_with_depression)).tolist())
+        priorities = [0] * n_patients
+        if rng.priority is not None:
+            priorities = rng.priority.sample_array(n=n_patients).tolist()
+
+        self.arrivalStream.set_arrivals(
+            times=times.tolist(),
+            first_patient_id=patient_id,
+            if_with_depression=if_with_depression,
+            exam_durations=exam_durations,
+            mh_consult_durations=[next(mh_consult_durations) if if_with else None
+                                  for if_with in if_with_depression],
+            priorities=priorities)
+
+    def create_patient(self, id, rng):
+        """ creates a new patient with depression status, service durations and priority class drawn on arrival
+        (so that with common random numbers each patient is the same across scenarios
+        regardless of the order in which patients are served)
+        :param id: (integer) patient ID
+        :param rng: random streams of this replication
+        :return: the new patient
+        """
+
+        # find the depression status of the patient
+        if_with_depression = rng.depression.sample()
+
+        # find the durations of exam and mental health consultation
+        exam_duration = rng.examTime.sample()
+        mh_consult_duration = None
+        if if_with_depression:
+            mh_consult_duration = rng.mhConsultTime.sample()
+
+        # find the priority class of the patient
+        priority = 0
+        if rng.priority is not None:
+            priority = rng.priority.sample()
+
+        return self.get_new_patient(id=id, if_with_depression=if_with_depression,
+                                    exam_duration=exam_duration, mh_consult_duration=mh_consult_duration,
+                                    priority=priority)
+
+    def get_new_patient(self, id, if_with_depression, exam_duration, mh_consult_duration, priority=0):
+        """ creates a new patient (or reuses a patient who left if patients are recycled)
+        (see Patient for the description of parameters)
+        :return: the new patient
+        """
+
+        # reuse a patient who left if patients are recycled
+        recycled_patients = self.simOutputs.recycledPatients
+        if recycled_patients:
+            patient = recycled_patients.pop()
+            patient.reset(id=id, if_with_depression=if_with_depression,
+                          exam_duration=exam_duration, mh_consult_duration=mh_consult_duration, priority=priority)
+            return patient
+
+        return Patient(id=id, if_with_depression=if_with_depression,
+                       exam_duration=exam_duration, mh_consult_duration=mh_consult_duration, priority=priority)
 
     def process_end_of_exam(self, physician, rng):
         """ processes the end of exam in the specified exam room
         :param physician: the exam room where the service is ended
-        :param rng: random number generator
+        :param rng: random streams of this replication
         """
 
         # trace
-        self.trace.add_message('Processing end of exam in ' + str(physician) + '.')
+        if self.trace.on:
+            self.trace.add_message(EXAM, 'Processing end of exam in {}.', physician)
 
         # get the patient who is about to be discharged
         this_patient = physician.remove_patient()
@@ -373,28 +560,32 @@ class UrgentCare:
         # check the mental health status of the patient
         if this_patient.ifWithDepression:
             # send the patient to the mental health specialist
-            # if the mental health specialist is busy
-            if self.MHP.isBusy:
+            # if all mental health specialists are busy
+            if self.idleMHPs.get_num_idle() == 0:
                 # the patient will join the waiting room in the mental health unity
                 self.mhConsultWaitingRoom.add_patient(patient=this_patient)
             else:
                 # this patient starts receiving mental health consultation
-                self.MHP.consult(patient=this_patient, rng=rng)
+                self.idleMHPs.acquire().consult(patient=this_patient, rng=rng)
 
         # check if there is any patient waiting
         if self.waitingRoom.get_num_patients_waiting() > 0:
 
             # start serving the next patient in line
             physician.exam(patient=self.waitingRoom.get_next_patient(), rng=rng)
+        else:
+            # the physician is idle
+            self.idlePCPs.release(server=physician)
 
     def process_end_of_consultation(self, mhp, rng):
         """ process the end of mental health consultation
         :param mhp: mental health physician
-        :param rng: random number generator
+        :param rng: random streams of this replication
         """
 
         # trace
-        self.trace.add_message('Processing end of mental health consult in ' + str(mhp) + '.')
+        if self.trace.on:
+            self.trace.add_message(MH, 'Processing end of mental health consult in {}.', mhp)
 
         # get the patient who is about to be discharged
         this_patient = mhp.remove_mh_patient()
@@ -403,13 +594,49 @@ class UrgentCare:
         if self.mhConsultWaitingRoom.get_num_patients_waiting() > 0:
             # start serving the next patient in line
             mhp.consult(patient=self.mhConsultWaitingRoom.get_next_patient(), rng=rng)
+        else:
+            # the physician is idle
+            self.idleMHPs.release(server=mhp)
 
     def process_close_urgent_care(self):
         """ process the closing of the urgent care """
 
         # trace
-        self.trace.add_message('Processing the closing of the urgent care.')
+        if self.trace.on:
+            self.trace.add_message(ARRIVAL, 'Processing the closing of the urgent care.')
 
         # close the urgent care
         self.ifOpen = False
 
+        # schedule the reopening at the start of the next day
+        if self.day + 1 < self.params.nDays:
+            self.simCal.add_event(
+                event=OpenUrgentCare(time=(self.day + 1) * self.params.hoursPerDay,
+                                     urgent_care=self)
+            )
+
+    def process_open_urgent_care(self, rng):
+        """ process the opening of the urgent care at the start of a new day
+        :param rng: random streams of this replication
+        """
+
+        # trace
+        if self.trace.on:
+            self.trace.add_message(ARRIVAL, 'Processing the opening of the urgent care.')
+
+        # open the urgent care
+        self.day += 1
+        self.ifOpen = True
+
+        # schedule the closing event
+        self.simCal.add_event(
+            event=CloseUrgentCare(time=self.simCal.time + self.params.hoursOpen,
+                                  urgent_care=self)
+        )
+
+        # schedule the arrival of the first patient of the day
+        # (unless an arrival scheduled before closing falls after the opening)
+        if not self.ifArrivalScheduled:
+            self.ifArrivalScheduled = True
+            self.schedule_arrival(patient_id=self.nextPatientId, rng=rng)
+
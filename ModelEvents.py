@@ -1,5 +1,4 @@
-from deampy.discrete_event_sim import SimulationEvent
-
+import math
 
 """ priority for processing the urgent care simulation events
     if they are to occur at the exact same time (low number implies higher priority)"""
@@ -7,9 +6,35 @@ ARRIVAL = 2
 END_OF_EXAM = 1
 END_OF_MH_CONSULT = 0
 CLOSE = 3
+OPEN = 4
+END_OF_WARM_UP = 5
+END_OF_BATCH = 5
+
+
+class SimulationEvent:
+    # base class for urgent care events (same interface as deampy's SimulationEvent
+    # but with __slots__ so that event objects do not carry a __dict__)
+    __slots__ = ('time', 'priority')
+
+    def __init__(self, time, priority):
+        """
+        :param time: (float) time of the event
+        :param priority: priority of the event (the lowest value implies the highest priority)
+        """
+        self.time = time
+        self.priority = priority
+
+    def process(self, rng=None):
+        """ implements instruction to process this event once occurs
+        :param rng: random streams of this replication
+        """
+
+        raise NotImplementedError("This is an abstract method and needs to be implemented in derived classes.")
 
 
 class Arrival(SimulationEvent):
+    __slots__ = ('patient', 'urgentCare')
+
     def __init__(self, time, patient, urgent_care):
         """
         creates the arrival of the next patient event
@@ -30,7 +55,75 @@ class Arrival(SimulationEvent):
         self.urgentCare.process_new_patient(patient=self.patient, rng=rng)
 
 
+class ArrivalStream(SimulationEvent):
+    # arrivals generated at once (times and patient attributes) and merged with the simulation calendar
+    # as an external source (see UrgentCareCalendar.set_external_source) instead of scheduling one Arrival
+    # event per patient; time is the time of the next arrival (math.inf when no arrival is pending)
+    __slots__ = ('urgentCare', 'times', 'firstPatientId', 'ifWithDepression', 'examDurations',
+                 'mhConsultDurations', 'priorities', 'i')
+
+    def __init__(self, urgent_care):
+        """
+        creates an empty stream of arrivals
+        :param urgent_care: the urgent care
+        """
+        # initialize the super class
+        SimulationEvent.__init__(self, time=math.inf, priority=ARRIVAL)
+
+        self.urgentCare = urgent_care
+        self.times = []                 # arrival times
+        self.firstPatientId = None      # id of the first patient of the stream
+        self.ifWithDepression = []      # if each patient has depression
+        self.examDurations = []         # exam duration of each patient
+        self.mhConsultDurations = []    # mental health consultation duration of each patient (None if not needed)
+        self.priorities = []            # priority class of each patient
+        self.i = 0                      # index of the next arrival
+
+    def set_arrivals(self, times, first_patient_id, if_with_depression, exam_durations, mh_consult_durations,
+                     priorities):
+        """ replaces the pending arrivals
+        :param times: (list) sorted arrival times
+        :param first_patient_id: id of the first patient (the following patients get consecutive ids)
+        (see ModelEntities.Patient for the description of other parameters, which are lists over patients)
+        """
+
+        self.times = times
+        self.firstPatientId = first_patient_id
+        self.ifWithDepression = if_with_depression
+        self.examDurations = exam_durations
+        self.mhConsultDurations = mh_consult_durations
+        self.priorities = priorities
+        self.i = 0
+        self.time = times[0] if len(times) > 0 else math.inf
+
+    def clear(self):
+        """ deletes the pending arrivals """
+
+        self.set_arrivals(times=[], first_patient_id=None, if_with_depression=[], exam_durations=[],
+                          mh_consult_durations=[], priorities=[])
+
+    def process(self, rng=None):
+        """ processes the next arrival of the stream """
+
+        i = self.i
+        patient = self.urgentCare.get_new_patient(id=self.firstPatientId + i,
+                                                  if_with_depression=self.ifWithDepression[i],
+                                                  exam_duration=self.examDurations[i],
+                                                  mh_consult_duration=self.mhConsultDurations[i],
+                                                  priority=self.priorities[i])
+
+        # move to the next arrival before the patient is received
+        # (receiving the patient can replace the pending arrivals)
+        self.i = i + 1
+        self.time = self.times[i + 1] if i + 1 < len(self.times) else math.inf
+
+        # receive the new patient
+        self.urgentCare.process_new_patient(patient=patient, rng=rng)
+
+
 class EndOfExam(SimulationEvent):
+    __slots__ = ('physician', 'urgentCare')
+
     def __init__(self, time, physician, urgent_care):
         """
         create the end of service for an specified exam room
@@ -52,6 +145,8 @@ class EndOfExam(SimulationEvent):
 
 
 class EndOfMentalHealthConsult(SimulationEvent):
+    __slots__ = ('consultRoom', 'urgentCare')
+
     def __init__(self, time, consult_room, urgent_care):
         """
         create the end of mental health consultation
@@ -73,6 +168,8 @@ class EndOfMentalHealthConsult(SimulationEvent):
 
 
 class CloseUrgentCare(SimulationEvent):
+    __slots__ = ('urgentCare',)
+
     def __init__(self, time, urgent_care):
         """
         create the event to close the urgent care
@@ -90,3 +187,107 @@ class CloseUrgentCare(SimulationEvent):
 
         # close the urgent care
         self.urgentCare.process_close_urgent_care()
+
+
+class OpenUrgentCare(SimulationEvent):
+    __slots__ = ('urgentCare',)
+
+    def __init__(self, time, urgent_care):
+        """
+        create the event to reopen the urgent care at the start of a new day
+        :param time: time of opening
+        :param urgent_care: the urgent care
+        """
+
+        self.urgentCare = urgent_care
+
+        # call the super class initialization
+        SimulationEvent.__init__(self, time=time, priority=OPEN)
+
+    def process(self, rng=None):
+        """ processes the opening event """
+
+        # open the urgent care
+        self.urgentCare.process_open_urgent_care(rng=rng)
+
+
+class BookkeepingEvent(SimulationEvent):
+    # base class for events that only record outputs (e.g. the end of a batch); they are scheduled with
+    # UrgentCareCalendar.add_bookkeeping_event and do not keep the simulation running
+    __slots__ = ('simCal',)
+
+    def __init__(self, time, priority, sim_cal):
+        """
+        :param time: (float) time of the event
+        :param priority: priority of the event (the lowest value implies the highest priority)
+        :param sim_cal: simulation calendar the event is scheduled in
+        """
+
+        self.simCal = sim_cal
+        SimulationEvent.__init__(self, time=time, priority=priority)
+
+    def process(self, rng=None):
+        """ processes this event (and removes it from the count of bookkeeping events of the calendar) """
+
+        self.simCal.nBookkeepingEvents -= 1
+        self.record()
+
+    def record(self):
+        """ records the outputs of this event """
+
+        raise NotImplementedError("This is an abstract method and needs to be implemented in derived classes.")
+
+
+class EndOfWarmUp(BookkeepingEvent):
+    __slots__ = ('simOutputs',)
+
+    def __init__(self, time, sim_outputs, sim_cal):
+        """
+        create the event to delete the observations collected during the warm-up period
+        :param time: time the warm-up period ends
+        :param sim_outputs: simulation outputs
+        :param sim_cal: simulation calendar
+        """
+
+        self.simOutputs = sim_outputs
+
+        # call the super class initialization
+        BookkeepingEvent.__init__(self, time=time, priority=END_OF_WARM_UP, sim_cal=sim_cal)
+
+    def record(self):
+        """ processes the end of warm-up period """
+
+        self.simOutputs.collect_end_of_warm_up()
+
+
+class EndOfBatch(BookkeepingEvent):
+    __slots__ = ('simOutputs', 'batchLength')
+
+    def __init__(self, time, sim_outputs, sim_cal, batch_length):
+        """
+        create the event to record the means of outputs over a batch
+        :param time: time the batch ends
+        :param sim_outputs: simulation outputs
+        :param sim_cal: simulation calendar (to schedule the end of the next batch)
+        :param batch_length: length of batches (hours)
+        """
+
+        self.simOutputs = sim_outputs
+        self.batchLength = batch_length
+
+        # call the super class initialization
+        BookkeepingEvent.__init__(self, time=time, priority=END_OF_BATCH, sim_cal=sim_cal)
+
+    def record(self):
+        """ processes the end of a batch """
+
+        self.simOutputs.collect_end_of_batch()
+
+        # schedule the end of the next batch (unless nothing else is going to happen;
+        # the last batch is cut at the end of the simulation, see SimOutputs.collect_end_of_simulation)
+        if self.simCal.n_model_events() > 0:
+            self.simCal.add_bookkeeping_event(
+                event=EndOfBatch(time=self.time + self.batchLength,
+                                 sim_outputs=self.simOutputs,
+                                 sim_cal=self.simCal,
+                                 batch_length=self.batchLength))
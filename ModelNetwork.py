@@ -0,0 +1,247 @@
+import multiprocessing as mp
+
+import InputData as D
+from ModelCalendar import UrgentCareCalendar
+from ModelEntities import UrgentCare
+from ModelEvents import CloseUrgentCare
+from ModelOutputs import SimOutputs
+from ModelTrace import ARRIVAL, UrgentCareTrace
+from MultiUrgentCareModel import ReplicationSummary
+from RandomStreams import RandomStreams
+
+
+class NetworkUrgentCare(UrgentCare):
+    # an urgent care in a network of urgent cares that share one simulation calendar
+    # (each urgent care uses its own random streams, and arriving patients can be diverted to
+    # a neighboring urgent care when the PCP waiting room is too long)
+
+    def __init__(self, id, parameters, sim_cal, sim_out, trace, rng, diversion_threshold=None):
+        """
+        :param id: ID of this urgent care (its index in the network)
+        :param parameters: parameters of this urgent care
+        :param sim_cal: simulation calendar (shared by urgent cares of the network)
+        :param sim_out: simulation outputs of this urgent care
+        :param trace: simulation trace
+        :param rng: random streams of this urgent care
+        :param diversion_threshold: arriving patients are diverted if at least this many patients are
+                                    waiting for a PCP (None not to divert patients)
+        """
+
+        UrgentCare.__init__(self, id=id, parameters=parameters, sim_cal=sim_cal, sim_out=sim_out, trace=trace)
+
+        self.rng = rng
+        self.diversionThreshold = diversion_threshold
+        self.neighbors = []     # urgent cares patients can be diverted to
+
+    def __str__(self):
+        return 'Urgent Care ' + str(self.id)
+
+    def process_new_patient(self, patient, rng=None):
+        """ receives a new patient (and diverts the patient to a neighbor if the waiting room is too long)
+        :param patient: the new patient
+        :param rng: not used (this urgent care uses its own random streams)
+        """
+
+        if self.ifOpen and self.diversionThreshold is not None \
+                and self.waitingRoom.get_num_patients_waiting() >= self.diversionThreshold:
+            neighbor = self.get_diversion_site()
+            if neighbor is not None:
+                if self.trace.on:
+                    self.trace.add_message(ARRIVAL, '{} is diverted from {} to {}.', patient, self, neighbor)
+
+                self.simOutputs.collect_patient_diversion(patient=patient)
+                neighbor.admit_diverted_patient(patient=patient)
+
+                # arrivals to this urgent care continue
+                self.schedule_arrival(patient_id=patient.id + 1, rng=self.rng)
+                return
+
+        UrgentCare.process_new_patient(self, patient=patient, rng=self.rng)
+
+    def admit_diverted_patient(self, patient):
+        """ admits a patient diverted from a neighbor
+        (the patient keeps its id, depression status and priority class, but the durations of exam and
+        mental health consultation are drawn again from the parameters and random streams of this urgent care)
+        :param patient: the diverted patient
+        """
+
+        patient.examDuration = self.rng.examTime.sample()
+        patient.mhConsultDuration = None
+        if patient.ifWithDepression:
+            patient.mhConsultDuration = self.rng.mhConsultTime.sample()
+
+        self.admit_patient(patient=patient, rng=self.rng)
+
+    def process_open_urgent_care(self, rng=None):
+        """ process the opening of the urgent care at the start of a new day
+        :param rng: not used (this urgent care uses its own random streams)
+        """
+
+        UrgentCare.process_open_urgent_care(self, rng=self.rng)
+
+    def get_diversion_site(self):
+        """ :returns: the open neighbor with the fewest patients waiting for a PCP
+        (None if no open neighbor has fewer patients waiting than the diversion threshold) """
+
+        site = None
+        n_waiting = self.diversionThreshold
+        for neighbor in self.neighbors:
+            if neighbor.ifOpen and neighbor.waitingRoom.get_num_patients_waiting() < n_waiting:
+                site = neighbor
+                n_waiting = neighbor.waitingRoom.get_num_patients_waiting()
+        return site
+
+
+def get_connected_components(n_sites, neighbors):
+    """
+    :param n_sites: number of urgent cares
+    :param neighbors: (dictionary) site index -> (list) indices of sites patients can be diverted to
+    :return: (list of lists) indices of sites in each group of sites connected through diversion
+    """
+
+    # union-find over diversion links (in either direction)
+    parent = list(range(n_sites))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, js in neighbors.items():
+        for j in js:
+            parent[find(i)] = find(j)
+
+    components = {}
+    for i in range(n_sites):
+        components.setdefault(find(i), []).append(i)
+    return list(components.values())
+
+
+def simulate_network_component(id, site_indices, site_params, neighbors, diversion_threshold, sim_duration,
+                               keep_patient_records, sample_path_max_points):
+    """ simulates a group of sites connected through diversion on one calendar
+    (see UrgentCareNetworkModel for the description of parameters)
+    :param site_indices: (list) indices of sites in this group
+    :param site_params: (list) parameters of these sites
+    :return: (list) summaries of sites (in the order of site indices)
+    """
+
+    sim_cal = UrgentCareCalendar()
+    trace = UrgentCareTrace(sim_calendar=sim_cal, if_should_trace=False, deci=D.DECI, categories=[])
+
+    sites = {}
+    for i, params in zip(site_indices, site_params):
+        sim_out = SimOutputs(sim_cal=sim_cal,
+                             keep_patient_records=keep_patient_records,
+                             sample_path_max_points=sample_path_max_points)
+        # the random streams of a site only depend on the network id and the site index
+        # (so results do not depend on how sites are sharded)
+        sites[i] = NetworkUrgentCare(id=i, parameters=params, sim_cal=sim_cal, sim_out=sim_out, trace=trace,
+                                     rng=RandomStreams(seed=[id, i], parameters=params),
+                                     diversion_threshold=diversion_threshold)
+
+    for i, site in sites.items():
+        site.neighbors = [sites[j] for j in neighbors.get(i, [])]
+
+        # schedule the closing event and the arrival of the first patient
+        sim_cal.add_event(event=CloseUrgentCare(time=site.params.hoursOpen, urgent_care=site))
+        site.schedule_arrival(patient_id=0, rng=site.rng)
+
+    sim_cal.process_events(sim_duration=sim_duration, rng=None)
+
+    summaries = []
+    for i in site_indices:
+        sites[i].simOutputs.collect_end_of_simulation()
+        summaries.append(ReplicationSummary(id=i, sim_outputs=sites[i].simOutputs))
+    return summaries
+
+
+def simulate_network_shard(args):
+    """ simulates groups of sites of an urgent care network (each group on its own calendar)
+    (defined at the module level so that it can be sent to worker processes)
+    :param args: (tuple) of (network id, list of groups of site indices, list of parameters of all sites,
+                 neighbors, diversion threshold, simulation duration, if patient records should be kept,
+                 maximum number of points of sample paths)
+    :return: (list) summaries of sites
+    """
+
+    (id, components, site_params, neighbors, diversion_threshold, sim_duration,
+     keep_patient_records, sample_path_max_points) = args
+
+    summaries = []
+    for component in components:
+        summaries.extend(simulate_network_component(
+            id=id, site_indices=component, site_params=[site_params[i] for i in component],
+            neighbors=neighbors, diversion_threshold=diversion_threshold, sim_duration=sim_duration,
+            keep_patient_records=keep_patient_records, sample_path_max_points=sample_path_max_points))
+    return summaries
+
+
+class UrgentCareNetworkModel:
+    # a network of urgent cares (each with its own parameters) simulated in one run;
+    # sites connected through diversion share a calendar, and groups of sites that are not connected
+    # are independent and are simulated in parallel on separate calendars.
+    # Only groups that are not connected are parallelized: a group connected through diversion (even weakly)
+    # is simulated in one process, so a network where all sites are linked runs serially. Splitting a connected
+    # group across processes would need synchronization between processes, but diversion has no lookahead:
+    # a patient is diverted at the time of arrival based on the current waiting rooms of neighbors and is
+    # admitted there immediately, so no time window is safe to simulate a site without its neighbors.
+
+    def __init__(self, id, site_parameters, neighbors=None, diversion_threshold=None,
+                 keep_patient_records=False, sample_path_max_points=None):
+        """
+        :param id: ID of this network model (also used to seed the random streams of sites)
+        :param site_parameters: (list) parameters of each urgent care
+        :param neighbors: (dictionary) site index -> (list) indices of sites patients can be diverted to
+        :param diversion_threshold: arriving patients are diverted to the neighbor with the fewest patients
+                                    waiting if at least this many patients are waiting for a PCP
+                                    (None not to divert patients)
+        :param keep_patient_records: set to True to keep the record of each patient
+        :param sample_path_max_points: maximum number of points kept in the trajectory of each sample path
+        """
+
+        self.id = id
+        self.siteParams = site_parameters
+        self.neighbors = {} if neighbors is None else neighbors
+        self.diversionThreshold = diversion_threshold
+        self.keepPatientRecords = keep_patient_records
+        self.samplePathMaxPoints = sample_path_max_points
+        self.siteSummaries = []     # summaries of sites (in the order of site_parameters)
+
+    def simulate(self, sim_duration, n_processes=None):
+        """ simulates all sites
+        :param sim_duration: duration of simulation (hours)
+        :param n_processes: number of worker processes (None to use all CPUs and 1 to simulate serially)
+        """
+
+        if n_processes is None:
+            n_processes = mp.cpu_count()
+
+        # sites connected through diversion share a calendar;
+        # groups are assigned to shards to balance the number of sites
+        components = get_connected_components(n_sites=len(self.siteParams), neighbors=self.neighbors)
+        shards = [[] for i in range(min(n_processes, len(components)))]
+        for component in sorted(components, key=len, reverse=True):
+            min(shards, key=lambda shard: sum(len(c) for c in shard)).append(component)
+
+        args = [(self.id, shard, self.siteParams, self.neighbors, self.diversionThreshold,
+                 sim_duration, self.keepPatientRecords, self.samplePathMaxPoints)
+                for shard in shards]
+
+        if len(args) == 1:
+            results = [simulate_network_shard(args[0])]
+        else:
+            with mp.Pool(processes=len(args)) as pool:
+                results = pool.map(simulate_network_shard, args, chunksize=1)
+
+        summaries = {summary.id: summary for shard_summaries in results for summary in shard_summaries}
+        self.siteSummaries = [summaries[i] for i in range(len(self.siteParams))]
+
+    def get_outcomes(self, attribute):
+        """
+        :param attribute: (string) name of an attribute of ReplicationSummary (e.g. 'aveWaitingTime')
+        :return: (list) the values of this attribute across sites
+        """
+
+        return [getattr(summary, attribute) for summary in self.siteSummaries]
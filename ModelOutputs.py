@@ -1,13 +1,110 @@
-from deampy.sample_path import PrevalenceSamplePath
+import math
+
+import numpy as np
+
+from ModelStatistics import OnlineStat, TimeWeightedSamplePath
+
+
+class PatientRecords:
+    # growable columnar store (one typed numpy array per column) for the records of departed patients
+
+    # names and types of columns (times are NaN if the patient did not go through that step)
+    COLUMNS = (('id', np.int64),
+               ('ifWithDepression', np.bool_),
+               ('priority', np.int8),
+               ('tArrived', np.float64),
+               ('tJoinedPCPWaitingRoom', np.float64),
+               ('tLeftPCPWaitingRoom', np.float64),
+               ('tJoinedMHWaitingRoom', np.float64),
+               ('tLeftMHWaitingRoom', np.float64),
+               ('tLeft', np.float64))
+
+    def __init__(self, initial_capacity=1024, chunk_size=256):
+        """
+        :param initial_capacity: number of records that fit in columns before they need to grow
+        :param chunk_size: number of records collected before they are copied into the columns
+        """
+
+        self._columns = {name: np.empty(initial_capacity, dtype=dtype) for name, dtype in self.COLUMNS}
+        self._n = 0             # number of records in the columns
+        self._chunkSize = chunk_size
+        self._pending = []      # records not yet copied into the columns
+
+    def __len__(self):
+        return self._n + len(self._pending)
+
+    def add(self, patient, t_left):
+        """ adds the record of a departing patient
+        :param patient: the departing patient
+        :param t_left: time the patient left the urgent care
+        """
+
+        self._pending.append((patient.id, patient.ifWithDepression, patient.priority, patient.tArrived,
+                              patient.tJoinedPCPWaitingRoom, patient.tLeftPCPWaitingRoom,
+                              patient.tJoinedMHWaitingRoom, patient.tLeftMHWaitingRoom,
+                              t_left))
+
+        if len(self._pending) == self._chunkSize:
+            self._flush()
+
+    def get_column(self, name):
+        """
+        :param name: name of the column (see COLUMNS)
+        :return: (numpy.array) the values of this column for all records
+        """
+
+        self._flush()
+        return self._columns[name][:self._n]
+
+    def _flush(self):
+        """ copies the pending records into the columns (doubling the capacity of columns if needed) """
+
+        n_new = len(self._pending)
+        if n_new == 0:
+            return
+
+        capacity = len(self._columns['id'])
+        if self._n + n_new > capacity:
+            while self._n + n_new > capacity:
+                capacity *= 2
+            for name, column in self._columns.items():
+                new_column = np.empty(capacity, dtype=column.dtype)
+                new_column[:self._n] = column[:self._n]
+                self._columns[name] = new_column
+
+        for (name, dtype), values in zip(self.COLUMNS, zip(*self._pending)):
+            self._columns[name][self._n:self._n + n_new] = np.array(values, dtype=dtype)
+
+        self._n += n_new
+        self._pending.clear()
+
+
+# columns of the table of batch means (see SimOutputs.batchMeans)
+BATCH_COLUMNS = ('batch', 'tStart', 'tEnd', 'nPatientsServed',
+                 'aveTimeInSystem', 'aveWaitingTime', 'aveMHWaitingTime',
+                 'aveNumWaitingPCP', 'aveNumWaitingMH', 'aveNumInSystem', 'aveNumPCPBusy', 'aveNumMHSBusy')
 
 
 class SimOutputs:
     # to collect the outputs of a simulation run
 
-    def __init__(self, sim_cal, trace_on=False):
+    def __init__(self, sim_cal, trace_on=False, keep_patient_records=True,
+                 sample_path_bucket_width=None, sample_path_max_points=None, warm_up_period=0, batch_length=None,
+                 recycle_patients=False):
         """
         :param sim_cal: simulation calendar
         :param trace_on: set to True to report patient summary
+        :param keep_patient_records: set to False to only keep streaming statistics (count, mean, variance,
+                                     min and max) of patient times instead of a record for each patient
+        :param sample_path_bucket_width: width of time buckets (hours) to downsample the trajectory of sample paths
+        :param sample_path_max_points: maximum number of points kept in the trajectory of each sample path
+        (if both are None, every change of sample paths is kept)
+        :param warm_up_period: (hours) observations collected before this time are deleted
+                               (see collect_end_of_warm_up)
+        :param batch_length: (hours) length of batches to record the means of outputs over
+                             (None not to record batch means, see collect_end_of_batch;
+                             the last batch ends with the simulation, so it can be shorter)
+        :param recycle_patients: set to True to keep departed patients so that they can be reused
         """
 
         self.simCal = sim_cal           # simulation calendar (to know the current time)
@@ -15,37 +112,66 @@ class SimOutputs:
         self.nPatientsArrived = 0       # number of patients arrived
         self.nPatientsServed = 0         # number of patients served
         self.nPatientsReceivedMHConsult = 0  # number of patients who received MH consultation
-        self.patientTimeInSystem = []   # observations on patients time in urgent care
-        self.patientTimeInPCPWaitingRoom = []  # observations on patients time in the waiting room
-        self.patientTimeInMHWaitingRoom = []  # observations on patients time in MH waiting room
+        self.nPatientsDiverted = 0      # number of arriving patients diverted to another urgent care
 
-        self.patientSummary = []    # id, tArrived, tLeft, duration waited, duration in the system
-        if self.traceOn:
-            self.patientSummary.append(
-                ['Patient', 'Time Arrived', 'Time Left', 'Time Waited', 'Time In the System'])
+        # departed patients to be reused for new patients (None if patients are not recycled)
+        self.recycledPatients = [] if recycle_patients else None
+
+        if keep_patient_records:
+            self.patientRecords = PatientRecords()  # records of departed patients
+        else:
+            self.patientRecords = None
+            # streaming statistics on patients time in urgent care, in the waiting room, and in MH waiting room
+            self.timeInSystemStat = OnlineStat(name='Patient time in system')
+            self.timeInPCPWaitingRoomStat = OnlineStat(name='Patient time in waiting room')
+            self.timeInMHWaitingRoomStat = OnlineStat(name='Patient time in MH waiting room')
+
+        self.samplePathBucketWidth = sample_path_bucket_width
+        self.samplePathMaxPoints = sample_path_max_points
+        self.warmUpPeriod = warm_up_period
+        self.batchLength = batch_length
 
         # sample path for the patients waiting
         # prevalence sample path: # of people in the waiting room to see a PCP
-        self.nPatientsWaitingPCP = PrevalenceSamplePath(
-            name='Number of patients waiting for PCP', initial_size=0)
+        self.nPatientsWaitingPCP = self._get_sample_path(
+            name='Number of patients waiting for PCP')
 
         # sample path for the patients waiting for MHS
-        self.nPatientsWaitingMH = PrevalenceSamplePath(
-            name='Number of patients waiting for MHS', initial_size=0)
+        self.nPatientsWaitingMH = self._get_sample_path(
+            name='Number of patients waiting for MHS')
 
         # sample path for the patients in system
-        self.nPatientInSystem = PrevalenceSamplePath(
-            name='Number of patients in the urgent care', initial_size=0)
+        self.nPatientInSystem = self._get_sample_path(
+            name='Number of patients in the urgent care')
 
         # sample path for PCP utilization
-        self.nPCPBusy = PrevalenceSamplePath(
-            name='Utilization of PCP', initial_size=0
-        )
+        self.nPCPBusy = self._get_sample_path(
+            name='Utilization of PCP')
 
         # sample path for MHS utilization
-        self.nMHSBusy = PrevalenceSamplePath(
-            name='Utilization of Mental Health Specialist', initial_size=0
-        )
+        self.nMHSBusy = self._get_sample_path(
+            name='Utilization of Mental Health Specialist')
+
+        # means of outputs over batches (one row per batch with the values of BATCH_COLUMNS)
+        self.batchMeans = []
+        self._batchStart = None     # time, sample-path areas and patient time sums at the start of current batch
+        if self.batchLength is not None:
+            self._start_batch()
+
+    def _get_sample_path(self, name):
+        """ :returns: a prevalence sample path that starts at 0 (downsampled if a bucket width or
+        a maximum number of points is specified; statistics of sample paths can be reset after warm-up
+        and computed over batches only if they are TimeWeightedSamplePath) """
+
+        if self.samplePathBucketWidth is None and self.samplePathMaxPoints is None \
+                and self.warmUpPeriod == 0 and self.batchLength is None:
+            # imported here since deampy.sample_path loads scipy and statsmodels
+            from deampy.sample_path import PrevalenceSamplePath
+            return PrevalenceSamplePath(name=name, initial_size=0)
+        else:
+            return TimeWeightedSamplePath(name=name, initial_size=0,
+                                          bucket_width=self.samplePathBucketWidth or 0,
+                                          max_points=self.samplePathMaxPoints)
 
     def collect_patient_arrival(self, patient):
         """ collects statistics upon arrival of a patient
@@ -61,6 +187,13 @@ class SimOutputs:
         # store arrival time of this patient
         patient.tArrived = self.simCal.time
 
+    def collect_patient_diversion(self, patient):
+        """ collects statistics when an arriving patient is diverted to another urgent care
+        :param patient: the diverted patient
+        """
+
+        self.nPatientsDiverted += 1
+
     def collect_patient_joining_pcp_waiting_room(self, patient):
         """ collects statistics when a patient joins the pcp waiting room
         :param patient: the patient who is joining the pcp waiting room
@@ -113,34 +246,31 @@ class SimOutputs:
         self.nPatientsServed += 1
         self.nPatientInSystem.record_increment(time=self.simCal.time, increment=-1)
 
-        time_in_system = self.simCal.time - patient.tArrived
-        if patient.tJoinedPCPWaitingRoom is None:
-            time_waiting_pcp = 0
-        else:
-            time_waiting_pcp = patient.tLeftPCPWaitingRoom - patient.tJoinedPCPWaitingRoom
-
-        self.patientTimeInPCPWaitingRoom.append(time_waiting_pcp)
-        self.patientTimeInSystem.append(time_in_system)
-
         if patient.ifWithDepression:
             self.nPatientsReceivedMHConsult += 1
-            if patient.tJoinedMHWaitingRoom is None:
-                time_waiting_mh = 0
-            else:
-                time_waiting_mh = patient.tLeftMHWaitingRoom - patient.tJoinedMHWaitingRoom
-
-            self.patientTimeInMHWaitingRoom.append(time_waiting_mh)
             self.nMHSBusy.record_increment(time=self.simCal.time, increment=-1)
 
-        # build the patient summary
-        if self.traceOn:
-            self.patientSummary.append([
-                str(patient),        # name
-                patient.tArrived,    # time arrived
-                self.simCal.time,    # time left
-                time_waiting_pcp,        # time waiting
-                time_in_system]      # time in the system
-            )
+        if self.patientRecords is not None:
+            # store the record of this patient
+            self.patientRecords.add(patient=patient, t_left=self.simCal.time)
+        else:
+            # update streaming statistics
+            self.timeInSystemStat.record(obs=self.simCal.time - patient.tArrived)
+            if patient.tJoinedPCPWaitingRoom is None:
+                self.timeInPCPWaitingRoomStat.record(obs=0)
+            else:
+                self.timeInPCPWaitingRoomStat.record(
+                    obs=patient.tLeftPCPWaitingRoom - patient.tJoinedPCPWaitingRoom)
+            if patient.ifWithDepression:
+                if patient.tJoinedMHWaitingRoom is None:
+                    self.timeInMHWaitingRoomStat.record(obs=0)
+                else:
+                    self.timeInMHWaitingRoomStat.record(
+                        obs=patient.tLeftMHWaitingRoom - patient.tJoinedMHWaitingRoom)
+
+        # the patient can be reused after the statistics are collected
+        if self.recycledPatients is not None:
+            self.recycledPatients.append(patient)
 
     def collect_patient_starting_pcp_exam(self):
         """ collects statistics for a patient who just started the exam with a pcp """
@@ -156,6 +286,103 @@ class SimOutputs:
 
         self.nMHSBusy.record_increment(time=self.simCal.time, increment=1)
 
+    def collect_end_of_warm_up(self):
+        """ deletes the observations collected during the warm-up period
+        (patients who arrived during the warm-up period but leave after it are still observed) """
+
+        self.nPatientsArrived = 0
+        self.nPatientsServed = 0
+        self.nPatientsReceivedMHConsult = 0
+        self.nPatientsDiverted = 0
+
+        if self.patientRecords is not None:
+            self.patientRecords = PatientRecords()
+        else:
+            self.timeInSystemStat = OnlineStat(name=self.timeInSystemStat.name)
+            self.timeInPCPWaitingRoomStat = OnlineStat(name=self.timeInPCPWaitingRoomStat.name)
+            self.timeInMHWaitingRoomStat = OnlineStat(name=self.timeInMHWaitingRoomStat.name)
+
+        for sample_path in self._get_sample_paths():
+            sample_path.reset_statistics(time=self.simCal.time)
+
+        # batches start after the warm-up period
+        if self.batchLength is not None:
+            self.batchMeans = []
+            self._start_batch()
+
+    def collect_end_of_batch(self):
+        """ records the means of outputs over the batch that just ended (see BATCH_COLUMNS) """
+
+        time = self.simCal.time
+        t_start, areas, sums = self._batchStart
+        duration = time - t_start
+        n, time_in_system, waiting_time, n_mh, mh_waiting_time = [
+            now - start for now, start in zip(self._get_patient_time_sums(), sums)]
+
+        row = [len(self.batchMeans) + 1, t_start, time, n,
+               time_in_system / n if n > 0 else math.nan,
+               waiting_time / n if n > 0 else math.nan,
+               mh_waiting_time / n_mh if n_mh > 0 else math.nan]
+        for sample_path, area in zip(self._get_sample_paths(), areas):
+            row.append((sample_path.get_area(time=time) - area) / duration if duration > 0 else math.nan)
+
+        self.batchMeans.append(row)
+        self._start_batch()
+
+    def get_batch_means(self, name):
+        """
+        :param name: name of a column of batch means (see BATCH_COLUMNS)
+        :return: (numpy.array) the values of this column for all batches
+        """
+
+        i = BATCH_COLUMNS.index(name)
+        return np.array([row[i] for row in self.batchMeans], dtype=float)
+
+    def get_batch_means_mean_and_half_width(self, name, alpha=0.05):
+        """
+        :param name: name of a column of batch means (see BATCH_COLUMNS)
+        :param alpha: significance level of the confidence interval
+        :return: (tuple) the mean of batch means and the half-width of its t-based confidence interval
+                 (batches without observations are excluded)
+        """
+
+        import scipy.stats as stat
+
+        values = self.get_batch_means(name)
+        values = values[~np.isnan(values)]
+
+        if len(values) < 2:
+            return math.nan, math.inf
+
+        half_width = stat.t.ppf(1 - alpha / 2, len(values) - 1) * values.std(ddof=1) / math.sqrt(len(values))
+        return float(values.mean()), float(half_width)
+
+    def _start_batch(self):
+        """ stores the time, the areas under sample paths and the sums of patient times at the start of a batch """
+
+        time = self.simCal.time
+        self._batchStart = (time,
+                            [sample_path.get_area(time=time) for sample_path in self._get_sample_paths()],
+                            self._get_patient_time_sums())
+
+    def _get_sample_paths(self):
+        """ :returns: (list) sample paths in the order of BATCH_COLUMNS """
+        return [self.nPatientsWaitingPCP, self.nPatientsWaitingMH, self.nPatientInSystem, self.nPCPBusy, self.nMHSBusy]
+
+    def _get_patient_time_sums(self):
+        """ :returns: (list) number of patients served and sums of their time in system and time in waiting room,
+        and number of patients who received MH consultation and sum of their time in MH waiting room """
+
+        if self.patientRecords is not None:
+            time_in_mh_waiting_room = self.patientTimeInMHWaitingRoom
+            return [self.nPatientsServed, float(np.sum(self.patientTimeInSystem)),
+                    float(np.sum(self.patientTimeInPCPWaitingRoom)),
+                    len(time_in_mh_waiting_room), float(np.sum(time_in_mh_waiting_room))]
+        else:
+            return [self.timeInSystemStat.n, self.timeInSystemStat.n * self.timeInSystemStat.mean,
+                    self.timeInPCPWaitingRoomStat.n * self.timeInPCPWaitingRoomStat.mean,
+                    self.timeInMHWaitingRoomStat.n, self.timeInMHWaitingRoomStat.n * self.timeInMHWaitingRoomStat.mean]
+
     def collect_end_of_simulation(self):
         """
         collects the performance statistics at the end of the simulation
@@ -168,23 +395,127 @@ class SimOutputs:
         self.nPCPBusy.close(time=self.simCal.time)
         self.nMHSBusy.close(time=self.simCal.time)
 
+        # record the last (partial) batch, which ends with the simulation
+        if self.batchLength is not None and self.simCal.time > self._batchStart[0]:
+            self.collect_end_of_batch()
+
+    @property
+    def patientTimeInSystem(self):
+        """ :returns: (numpy.array) observations on patients time in urgent care """
+
+        records = self._get_patient_records()
+        return records.get_column('tLeft') - records.get_column('tArrived')
+
+    @property
+    def patientTimeInPCPWaitingRoom(self):
+        """ :returns: (numpy.array) observations on patients time in the waiting room
+        (0 for patients who did not wait) """
+
+        records = self._get_patient_records()
+        waits = records.get_column('tLeftPCPWaitingRoom') - records.get_column('tJoinedPCPWaitingRoom')
+        return np.nan_to_num(waits, nan=0)
+
+    @property
+    def patientTimeInMHWaitingRoom(self):
+        """ :returns: (numpy.array) observations on patients time in MH waiting room
+        (only for patients who received MH consultation, 0 for patients who did not wait) """
+
+        records = self._get_patient_records()
+        with_depression = records.get_column('ifWithDepression')
+        waits = (records.get_column('tLeftMHWaitingRoom')[with_depression]
+                 - records.get_column('tJoinedMHWaitingRoom')[with_depression])
+        return np.nan_to_num(waits, nan=0)
+
+    @property
+    def patientSummary(self):
+        """ :returns: (list of lists) id, tArrived, tLeft, duration waited, duration in the system
+        (empty if trace is off) """
+
+        if not self.traceOn:
+            return []
+
+        records = self._get_patient_records()
+        summary = [['Patient', 'Time Arrived', 'Time Left', 'Time Waited', 'Time In the System']]
+        summary.extend(
+            [['Patient ' + str(id), t_arrived, t_left, time_waiting_pcp, time_in_system]
+             for id, t_arrived, t_left, time_waiting_pcp, time_in_system in zip(
+                records.get_column('id').tolist(),
+                records.get_column('tArrived').tolist(),
+                records.get_column('tLeft').tolist(),
+                self.patientTimeInPCPWaitingRoom.tolist(),
+                self.patientTimeInSystem.tolist())]
+        )
+        return summary
+
+    def _get_patient_records(self):
+        """ :returns: the records of departed patients (raises an error if records are not kept) """
+
+        if self.patientRecords is None:
+            raise ValueError('Patient records are not kept. '
+                             'Set keep_patient_records = True when initializing SimOutputs.')
+        return self.patientRecords
+
+    def get_patient_time_in_system_stat(self):
+        """
+        :return: (OnlineStat) statistics of patient time in system
+        """
+
+        if self.patientRecords is None:
+            return self.timeInSystemStat
+        return OnlineStat.from_values(self.patientTimeInSystem, name='Patient time in system')
+
+    def get_patient_waiting_time_stat(self):
+        """
+        :return: (OnlineStat) statistics of patient waiting time
+        """
+
+        if self.patientRecords is None:
+            return self.timeInPCPWaitingRoomStat
+        return OnlineStat.from_values(self.patientTimeInPCPWaitingRoom, name='Patient time in waiting room')
+
+    def get_patient_waiting_time_percentile(self, q):
+        """
+        :param q: percentile (between 0 and 100)
+        :return: the q-th percentile of patient waiting time (requires patient records)
+        """
+
+        waits = self.patientTimeInPCPWaitingRoom
+        if len(waits) == 0:
+            return math.nan
+        return float(np.percentile(waits, q))
+
+    def get_patient_mh_waiting_time_stat(self):
+        """
+        :return: (OnlineStat) statistics of patient waiting time for MHS
+        """
+
+        if self.patientRecords is None:
+            return self.timeInMHWaitingRoomStat
+        return OnlineStat.from_values(self.patientTimeInMHWaitingRoom, name='Patient time in MH waiting room')
+
     def get_ave_patient_time_in_system(self):
         """
         :return: average patient time in system
         """
 
-        return sum(self.patientTimeInSystem)/len(self.patientTimeInSystem)
+        if self.patientRecords is None:
+            return self.timeInSystemStat.get_mean()
+        return float(self.patientTimeInSystem.mean())
 
     def get_ave_patient_waiting_time(self):
         """
         :return: average patient waiting time
         """
 
-        return sum(self.patientTimeInPCPWaitingRoom)/len(self.patientTimeInPCPWaitingRoom)
+        if self.patientRecords is None:
+            return self.timeInPCPWaitingRoomStat.get_mean()
+        return float(self.patientTimeInPCPWaitingRoom.mean())
 
     def get_ave_patient_mh_waiting_time(self):
         """
         :return: average patient waiting time for MHS
         """
 
-        return sum(self.patientTimeInMHWaitingRoom)/len(self.patientTimeInMHWaitingRoom)
+        if self.patientRecords is None:
+            return self.timeInMHWaitingRoomStat.get_mean()
+        return float(self.patientTimeInMHWaitingRoom.mean())
@@ -1,14 +1,40 @@
-from deampy.random_variates import Exponential
-
 import InputData as D
 
 
 class Parameters:
     # class to contain the parameters of the urgent care model
-    def __init__(self):
-        self.hoursOpen = D.HOURS_OPEN
-        self.nPCPs = D.N_PCP
-        self.arrivalTimeDist = Exponential(scale=D.MEAN_ARRIVAL_TIME)
-        self.examTimeDist = Exponential(scale=D.MEAN_EXAM_DURATION)
-        self.probDepression = D.PROB_DEPRESSION
-        self.mentalHealthConsultDist = Exponential(scale=D.MEAN_MH_CONSULT)
+    # (parameters that are not provided are read from InputData)
+    def __init__(self, hours_open=None, n_pcps=None, n_mhps=None, assignment_policy=None,
+                 mean_arrival_time=None, mean_exam_duration=None, prob_depression=None, mean_mh_consult=None,
+                 n_days=None, priority_probs=None):
+        """
+        :param hours_open: hours the urgent care opens
+        :param n_pcps: number of primary-care physicians
+        :param n_mhps: number of mental health physicians
+        :param assignment_policy: policy to assign idle physicians ('lowest-id', 'round-robin', 'least-utilized')
+        :param mean_arrival_time: mean patients inter-arrival time (hours)
+        :param mean_exam_duration: mean of exam duration (hours)
+        :param prob_depression: probability that a patient is diagnosed with depression
+        :param mean_mh_consult: mean duration of mental health consultation (hours)
+        :param n_days: number of days the urgent care opens (it reopens at the start of each day)
+        :param priority_probs: (list) probability that a patient is in each priority class (class 0 is served
+                               first and patients of the same class are served first-come-first-served);
+                               if None, all patients are served first-come-first-served
+        """
+
+        self.hoursOpen = D.HOURS_OPEN if hours_open is None else hours_open
+        self.nDays = D.N_DAYS if n_days is None else n_days
+        self.hoursPerDay = D.HOURS_PER_DAY
+        self.nPCPs = D.N_PCP if n_pcps is None else n_pcps
+        self.nMHPs = D.N_MHP if n_mhps is None else n_mhps
+        self.assignmentPolicy = D.ASSIGNMENT_POLICY if assignment_policy is None else assignment_policy
+        self.meanArrivalTime = D.MEAN_ARRIVAL_TIME if mean_arrival_time is None else mean_arrival_time
+        self.meanExamDuration = D.MEAN_EXAM_DURATION if mean_exam_duration is None else mean_exam_duration
+        self.probDepression = D.PROB_DEPRESSION if prob_depression is None else prob_depression
+        self.meanMHConsult = D.MEAN_MH_CONSULT if mean_mh_consult is None else mean_mh_consult
+        self.priorityProbs = D.PRIORITY_PROBS if priority_probs is None else priority_probs
+
+        # the urgent care should close before it reopens the next day
+        if self.nDays > 1 and self.hoursOpen > self.hoursPerDay:
+            raise ValueError('Hours open ({}) cannot be more than hours per day ({}) when the urgent care '
+                             'opens for more than one day.'.format(self.hoursOpen, self.hoursPerDay))
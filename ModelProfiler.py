@@ -0,0 +1,116 @@
+import time
+
+""" categories of profiled operations """
+EVENT = 'event'             # processing of events (by event class, includes the operations below)
+COLLECT = 'collect'         # SimOutputs.collect_* methods
+CALENDAR = 'calendar'       # calendar operations
+SAMPLE_PATH = 'sample path'  # recording of sample paths
+TRACE = 'trace'             # recording of trace messages
+
+
+class SimProfiler:
+    # opt-in instrumentation of the simulation loop: counts and cumulative times of operations
+    # and the maximum size of the calendar and waiting rooms
+    # (without a profiler, the simulation loop is not instrumented at all)
+
+    def __init__(self):
+
+        self.stats = {}             # (category, name) -> [count, cumulative time (seconds)]
+        self.wallTime = 0           # wall time of the simulation loop (seconds)
+        self.maxCalendarSize = 0    # maximum number of events in the calendar
+        self.maxPCPQueueLength = 0  # maximum number of patients in the PCP waiting room
+        self.maxMHQueueLength = 0   # maximum number of patients in the MH waiting room
+
+    def instrument(self, sim_cal, sim_out, trace):
+        """ replaces methods of these objects with timed versions
+        :param sim_cal: simulation calendar
+        :param sim_out: simulation outputs
+        :param trace: simulation trace
+        """
+
+        sim_cal.add_event = self._get_timed(CALENDAR, 'add_event', sim_cal.add_event)
+
+        for name in dir(sim_out):
+            if name.startswith('collect_'):
+                setattr(sim_out, name, self._get_timed(COLLECT, name, getattr(sim_out, name)))
+
+        for sample_path in (sim_out.nPatientsWaitingPCP, sim_out.nPatientsWaitingMH, sim_out.nPatientInSystem,
+                            sim_out.nPCPBusy, sim_out.nMHSBusy):
+            sample_path.record_increment = self._get_timed(SAMPLE_PATH, 'record_increment',
+                                                           sample_path.record_increment)
+
+        trace.add_message = self._get_timed(TRACE, 'add_message', trace.add_message)
+
+    def process_events(self, sim_cal, urgent_care, sim_duration, rng):
+        """ processes events as UrgentCareCalendar.process_events does while timing each operation
+        :param sim_cal: simulation calendar
+        :param urgent_care: urgent care (to measure the length of waiting rooms)
+        :param sim_duration: duration of simulation
+        :param rng: random streams to pass to events
+        """
+
+        clock = time.perf_counter
+        start = clock()
+
+        while sim_cal.n_model_events() > 0 and sim_cal.time <= sim_duration:
+            self.maxCalendarSize = max(self.maxCalendarSize, sim_cal.n_events())
+
+            t = clock()
+            event = sim_cal.get_next_event()
+            self._record(CALENDAR, 'get_next_event', clock() - t)
+
+            t = clock()
+            event.process(rng)
+            self._record(EVENT, type(event).__name__, clock() - t)
+            sim_cal.nEventsProcessed += 1
+
+            self.maxPCPQueueLength = max(self.maxPCPQueueLength, urgent_care.waitingRoom.get_num_patients_waiting())
+            self.maxMHQueueLength = max(self.maxMHQueueLength,
+                                        urgent_care.mhConsultWaitingRoom.get_num_patients_waiting())
+
+        self.wallTime += clock() - start
+
+    def get_summary_table(self):
+        """
+        :return: (list of lists) category, name, count, cumulative time (seconds), mean time (microseconds),
+                 and percent of the wall time of each profiled operation (the first row is the header)
+        """
+
+        table = [['Category', 'Name', 'Count', 'Time (s)', 'Mean (us)', '% of Wall Time']]
+        for (category, name), (count, total) in sorted(self.stats.items(), key=lambda item: -item[1][1]):
+            table.append([category, name, count, total, 1e6 * total / count,
+                          100 * total / self.wallTime if self.wallTime > 0 else 0])
+        return table
+
+    def print_summary(self):
+        """ prints the summary table and the maximum size of the calendar and waiting rooms """
+
+        table = self.get_summary_table()
+        print('{:12s} {:45s} {:>9s} {:>9s} {:>9s} {:>9s}'.format(*table[0]))
+        for row in table[1:]:
+            print('{:12s} {:45s} {:9d} {:9.4f} {:9.2f} {:9.1f}'.format(*row))
+        print('Wall time (s): {:.4f}'.format(self.wallTime))
+        print('Maximum calendar size:', self.maxCalendarSize)
+        print('Maximum PCP waiting room length:', self.maxPCPQueueLength)
+        print('Maximum MH waiting room length:', self.maxMHQueueLength)
+
+    def _record(self, category, name, elapsed):
+        stat = self.stats.get((category, name))
+        if stat is None:
+            self.stats[(category, name)] = [1, elapsed]
+        else:
+            stat[0] += 1
+            stat[1] += elapsed
+
+    def _get_timed(self, category, name, method):
+        """ :returns: a function that calls the method and records its count and time """
+
+        clock = time.perf_counter
+
+        def timed(*args, **kwargs):
+            t = clock()
+            result = method(*args, **kwargs)
+            self._record(category, name, clock() - t)
+            return result
+
+        return timed
@@ -0,0 +1,56 @@
+import heapq
+from collections import deque
+
+
+class FIFOQueue:
+    def __init__(self):
+        """ creates a first-in-first-out queue (O(1) insertion and removal) """
+
+        self._q = deque()
+
+    def __len__(self):
+        return len(self._q)
+
+    def add(self, item):
+        """ adds an item to the end of the queue
+        :param item: the item to add
+        """
+        self._q.append(item)
+
+    def peek(self):
+        """ :returns: the next item in line (without removing it) """
+        return self._q[0]
+
+    def pop(self):
+        """ :returns: the next item in line (and removes it from the queue) """
+        return self._q.popleft()
+
+
+class PriorityQueue:
+    def __init__(self, get_priority):
+        """ creates a queue where items are served by priority class
+        (low number implies higher priority) and first-in-first-out within a priority class
+        :param get_priority: function that returns the priority class of an item (e.g. the triage level of a patient)
+        """
+
+        self._q = []            # heap of [priority, sequence number, item]
+        self._getPriority = get_priority
+        self._nAdded = 0        # number of items added (to break ties within a priority class)
+
+    def __len__(self):
+        return len(self._q)
+
+    def add(self, item):
+        """ adds an item to the queue
+        :param item: the item to add
+        """
+        heapq.heappush(self._q, (self._getPriority(item), self._nAdded, item))
+        self._nAdded += 1
+
+    def peek(self):
+        """ :returns: the next item in line (without removing it) """
+        return self._q[0][2]
+
+    def pop(self):
+        """ :returns: the next item in line (and removes it from the queue) """
+        return heapq.heappop(self._q)[2]
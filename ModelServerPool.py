@@ -0,0 +1,64 @@
+import heapq
+from collections import deque
+
+""" policies to assign an idle server to a new patient """
+LOWEST_ID = 'lowest-id'             # the idle server with the lowest id
+ROUND_ROBIN = 'round-robin'         # servers take turns (the server that has been idle the longest)
+LEAST_UTILIZED = 'least-utilized'   # the idle server with the lowest total busy time so far
+
+
+class ServerPool:
+    def __init__(self, servers, sim_cal, policy=LOWEST_ID):
+        """ keeps track of idle servers (all servers are idle initially)
+        :param servers: (list) of servers (physicians) with integer ids
+        :param sim_cal: simulation calendar (to measure busy times under the least-utilized policy)
+        :param policy: policy to assign an idle server (LOWEST_ID, ROUND_ROBIN or LEAST_UTILIZED)
+        """
+
+        self.simCal = sim_cal
+        self.policy = policy
+
+        if policy == LOWEST_ID:
+            # heap of (id, server)
+            self._idle = [(server.id, server) for server in servers]
+            heapq.heapify(self._idle)
+        elif policy == ROUND_ROBIN:
+            # queue of servers in the order they became idle
+            self._idle = deque(servers)
+        elif policy == LEAST_UTILIZED:
+            # heap of (total busy time, id, server)
+            self._idle = [(0, server.id, server) for server in servers]
+            heapq.heapify(self._idle)
+            self._busyTime = {server.id: 0 for server in servers}  # total busy time of each server
+            self._tAcquired = {}    # time each busy server was acquired
+        else:
+            raise ValueError('Invalid server assignment policy: {}.'.format(policy))
+
+    def get_num_idle(self):
+        """ :returns: the number of idle servers """
+        return len(self._idle)
+
+    def acquire(self):
+        """ :returns: an idle server selected by the assignment policy (the server is no longer idle) """
+
+        if self.policy == LOWEST_ID:
+            return heapq.heappop(self._idle)[1]
+        elif self.policy == ROUND_ROBIN:
+            return self._idle.popleft()
+        else:
+            server = heapq.heappop(self._idle)[2]
+            self._tAcquired[server.id] = self.simCal.time
+            return server
+
+    def release(self, server):
+        """ returns a server that became idle to the pool
+        :param server: the server that is now idle
+        """
+
+        if self.policy == LOWEST_ID:
+            heapq.heappush(self._idle, (server.id, server))
+        elif self.policy == ROUND_ROBIN:
+            self._idle.append(server)
+        else:
+            self._busyTime[server.id] += self.simCal.time - self._tAcquired.pop(server.id)
+            heapq.heappush(self._idle, (self._busyTime[server.id], server.id, server))
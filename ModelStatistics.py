@@ -0,0 +1,233 @@
+import math
+
+import numpy as np
+
+
+class OnlineStat:
+    # mean, variance, min and max of observations updated one observation at a time (Welford's algorithm)
+    # in constant memory; statistics collected separately can be merged
+
+    def __init__(self, name=None):
+        """
+        :param name: name of this statistic
+        """
+
+        self.name = name
+        self.n = 0              # number of observations
+        self.mean = 0           # mean of observations
+        self.m2 = 0             # sum of squared deviations from the mean
+        self.min = math.inf
+        self.max = -math.inf
+
+    @staticmethod
+    def from_values(values, name=None):
+        """
+        :param values: (numpy.array) observations
+        :param name: name of this statistic
+        :return: an OnlineStat with the statistics of these observations
+        """
+
+        stat = OnlineStat(name=name)
+        if len(values) > 0:
+            stat.n = len(values)
+            stat.mean = float(np.mean(values))
+            stat.m2 = float(np.sum((values - stat.mean) ** 2))
+            stat.min = float(np.min(values))
+            stat.max = float(np.max(values))
+        return stat
+
+    def record(self, obs):
+        """ updates the statistics with a new observation
+        :param obs: the new observation
+        """
+
+        self.n += 1
+        delta = obs - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (obs - self.mean)
+        if obs < self.min:
+            self.min = obs
+        if obs > self.max:
+            self.max = obs
+
+    def merge(self, other):
+        """ adds the observations summarized in another OnlineStat to this one (Chan et al.'s formula)
+        :param other: an OnlineStat
+        """
+
+        if other.n == 0:
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def get_count(self):
+        return self.n
+
+    def get_mean(self):
+        """ :returns: mean of observations (NaN if there is no observation) """
+        return self.mean if self.n > 0 else math.nan
+
+    def get_var(self):
+        """ :returns: sample variance of observations (NaN if there are fewer than 2 observations) """
+        return self.m2 / (self.n - 1) if self.n > 1 else math.nan
+
+    def get_stdev(self):
+        return math.sqrt(self.get_var())
+
+    def get_min(self):
+        return self.min
+
+    def get_max(self):
+        return self.max
+
+
+class TimeWeightedSamplePath:
+    # prevalence sample path that keeps exact time-weighted statistics (mean, max and time spent at each level)
+    # updated incrementally, and a trajectory with at most one point per time bucket for plotting;
+    # the width of buckets doubles whenever the trajectory has more than max_points points
+    # (same interface as deampy's PrevalenceSamplePath without importing deampy.sample_path,
+    # which loads scipy and statsmodels; see to_prevalence_sample_path to plot it with deampy)
+
+    def __init__(self, name, initial_size=0, bucket_width=0, max_points=None):
+        """
+        :param name: name of this sample path
+        :param initial_size: value of the sample path at simulation time 0
+        :param bucket_width: width of time buckets of the trajectory (0 to keep a point for every change)
+        :param max_points: maximum number of points of the trajectory (None for no maximum)
+        """
+
+        self.name = name
+        self.currentSize = initial_size     # current value of the sample path
+        self._times = [0]                   # times of points of the trajectory
+        self._values = [initial_size]       # values of points of the trajectory
+
+        self.bucketWidth = bucket_width
+        self.maxPoints = max_points
+
+        self._tStart = 0                # time statistics are collected from
+        self._tLast = 0                 # time of the last change
+        self._area = 0                  # area under the sample path from _tStart until the last change
+        self._max = initial_size        # maximum value
+        self._timeAtLevel = {}          # value -> total time the sample path had this value
+
+    def record_increment(self, time, increment):
+        """
+        updates the value of this sample path (e.g. number of people in the system)
+        :param time: time of this change
+        :param increment: (integer) change (+ or -) in value of this sample path
+        """
+
+        if time < self._tLast:
+            raise ValueError(self.name + ' | Current time cannot be less than the last recorded time.')
+
+        # update statistics
+        duration = time - self._tLast
+        if duration > 0:
+            self._area += self.currentSize * duration
+            self._timeAtLevel[self.currentSize] = self._timeAtLevel.get(self.currentSize, 0) + duration
+            self._tLast = time
+
+        self.currentSize += increment
+        if self.currentSize > self._max:
+            self._max = self.currentSize
+
+        # update the trajectory (one point per bucket)
+        if time == self._times[-1] or (
+                self.bucketWidth > 0 and time // self.bucketWidth == self._times[-1] // self.bucketWidth):
+            self._values[-1] = self.currentSize
+        else:
+            self._times.append(time)
+            self._values.append(self.currentSize)
+
+            if self.maxPoints is not None and len(self._times) > self.maxPoints:
+                self._downsample()
+
+    def record_value(self, time, value):
+        """
+        updates the value of this sample path
+        :param time: time of this change
+        :param value: the new value of this sample path
+        """
+
+        self.record_increment(time=time, increment=value - self.currentSize)
+
+    def close(self, time):
+        self.record_increment(time=time, increment=0)
+
+    def get_times(self):
+        """ :returns: (list) times of points of the trajectory """
+        return self._times
+
+    def get_values(self):
+        """ :returns: (list) values of points of the trajectory """
+        return self._values
+
+    def to_prevalence_sample_path(self):
+        """ :returns: (deampy.sample_path.PrevalenceSamplePath) with the trajectory of this sample path
+        (to plot it with deampy.plots.sample_paths) """
+
+        from deampy.sample_path import PrevalenceSamplePath
+
+        sample_path = PrevalenceSamplePath(name=self.name, initial_size=self._values[0], collect_stat=False)
+        sample_path._times = list(self._times)
+        sample_path._values = list(self._values)
+        sample_path.currentSize = self.currentSize
+        return sample_path
+
+    def reset_statistics(self, time):
+        """ deletes the statistics collected until this time (e.g. at the end of a warm-up period)
+        but keeps the current value and the trajectory
+        :param time: time statistics are collected from
+        """
+
+        self.record_increment(time=time, increment=0)
+        self._tStart = time
+        self._area = 0
+        self._max = self.currentSize
+        self._timeAtLevel = {}
+
+    def get_area(self, time):
+        """
+        :param time: a time not before the last change
+        :return: the area under this sample path from the time statistics are collected from until this time
+        """
+
+        return self._area + self.currentSize * (time - self._tLast)
+
+    def get_mean(self):
+        """ :returns: the time-weighted mean of this sample path """
+        duration = self._tLast - self._tStart
+        return self._area / duration if duration > 0 else 0
+
+    def get_max(self):
+        """ :returns: the maximum value of this sample path """
+        return self._max
+
+    def get_time_at_level(self):
+        """ :returns: (dictionary) of value -> total time this sample path had this value """
+        return dict(self._timeAtLevel)
+
+    def _downsample(self):
+        """ doubles the width of time buckets and keeps the last point of each bucket """
+
+        if self.bucketWidth > 0:
+            self.bucketWidth *= 2
+        else:
+            self.bucketWidth = 2 * self._times[-1] / self.maxPoints
+
+        times = [self._times[0]]
+        values = [self._values[0]]
+        for t, value in zip(self._times[1:], self._values[1:]):
+            if t // self.bucketWidth == times[-1] // self.bucketWidth:
+                values[-1] = value
+            else:
+                times.append(t)
+                values.append(value)
+
+        self._times = times
+        self._values = values
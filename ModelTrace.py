@@ -0,0 +1,39 @@
+from deampy.support.simulation import DiscreteEventSimTrace
+
+""" categories of trace messages """
+ARRIVAL = 'arrival'     # arrivals, admissions and closing of the urgent care
+EXAM = 'exam'           # PCP exams
+MH = 'mh'               # mental health consultations
+QUEUE = 'queue'         # patients joining or leaving waiting rooms
+ALL_CATEGORIES = (ARRIVAL, EXAM, MH, QUEUE)
+
+
+class UrgentCareTrace(DiscreteEventSimTrace):
+    def __init__(self, sim_calendar, if_should_trace, deci, categories=ALL_CATEGORIES):
+        """ trace where messages are only formatted if their category is traced
+        :param sim_calendar: simulation calendar
+        :param if_should_trace: set to True to trace the simulation
+        :param deci: number of decimals to round time values to
+        :param categories: (list) of categories of messages to trace (e.g. [ARRIVAL, QUEUE])
+        """
+
+        DiscreteEventSimTrace.__init__(self, sim_calendar=sim_calendar, if_should_trace=if_should_trace, deci=deci)
+
+        if if_should_trace:
+            self.categories = frozenset(categories)
+        else:
+            self.categories = frozenset()
+
+        # callers should check this before calling add_message
+        # so that disabled tracing only costs one attribute check
+        self.on = len(self.categories) > 0
+
+    def add_message(self, category, template, *args):
+        """ adds a message to the trace list if its category is traced
+        :param category: category of this message (ARRIVAL, EXAM, MH, or QUEUE)
+        :param template: (string) the message with {} in place of arguments
+        :param args: arguments to format the message with
+        """
+
+        if category in self.categories:
+            self._add_message(time=self._simCalendar.time, message=template.format(*args))
@@ -0,0 +1,256 @@
+import math
+import multiprocessing as mp
+
+import numpy as np
+import scipy.stats as stat
+
+from ModelDataset import ReplicationDataset
+from ModelStatistics import OnlineStat
+from UrgentCareModel import UrgentCareModel
+
+
+class ReplicationSummary:
+    # compact summary of a simulation replication
+    # (so that the SimOutputs of each replication do not need to be sent back from the worker processes)
+
+    def __init__(self, id, sim_outputs):
+        """
+        :param id: ID of the replication
+        :param sim_outputs: simulation outputs of this replication
+        """
+
+        self.id = id
+        self.nPatientsArrived = sim_outputs.nPatientsArrived
+        self.nPatientsServed = sim_outputs.nPatientsServed
+        self.nPatientsReceivedMHConsult = sim_outputs.nPatientsReceivedMHConsult
+        self.nPatientsDiverted = sim_outputs.nPatientsDiverted
+
+        # average waiting times
+        self.aveTimeInSystem = sim_outputs.get_ave_patient_time_in_system()
+        self.aveWaitingTime = sim_outputs.get_ave_patient_waiting_time()
+        self.aveMHWaitingTime = sim_outputs.get_ave_patient_mh_waiting_time()
+
+        # 90th percentile of patient waiting times (only if patient records are kept)
+        self.p90WaitingTime = math.nan
+        if sim_outputs.patientRecords is not None:
+            self.p90WaitingTime = sim_outputs.get_patient_waiting_time_percentile(q=90)
+
+        # statistics of patient times (to be merged across replications)
+        self.timeInSystemStat = sim_outputs.get_patient_time_in_system_stat()
+        self.waitingTimeStat = sim_outputs.get_patient_waiting_time_stat()
+        self.mhWaitingTimeStat = sim_outputs.get_patient_mh_waiting_time_stat()
+
+        # time-averaged queue lengths and utilizations
+        self.aveNumWaitingPCP = sim_outputs.nPatientsWaitingPCP.get_mean()
+        self.aveNumWaitingMH = sim_outputs.nPatientsWaitingMH.get_mean()
+        self.aveNumInSystem = sim_outputs.nPatientInSystem.get_mean()
+        self.aveNumPCPBusy = sim_outputs.nPCPBusy.get_mean()
+        self.aveNumMHSBusy = sim_outputs.nMHSBusy.get_mean()
+
+
+def get_mean_and_half_width(values, alpha):
+    """
+    :param values: (list) values of an outcome across replications
+    :param alpha: significance level of the confidence interval
+    :return: (tuple) the mean of the values and the half-width of its t-based confidence interval
+             (values that are not defined are excluded)
+    """
+
+    values = np.array(values, dtype=float)
+    values = values[~np.isnan(values)]
+
+    if len(values) < 2:
+        return math.nan, math.inf
+
+    half_width = stat.t.ppf(1 - alpha / 2, len(values) - 1) * values.std(ddof=1) / math.sqrt(len(values))
+    return float(values.mean()), float(half_width)
+
+
+def simulate_replication(args):
+    """ simulates one replication of the urgent care model
+    (defined at the module level so that it can be sent to worker processes)
+    :param args: (tuple) of (replication id, parameters, simulation duration, if patient records should be kept,
+                 directory of the dataset to export outputs into (None not to export))
+    :return: the summary of this replication
+    """
+
+    id, parameters, sim_duration, keep_patient_records, export_directory = args
+
+    model = UrgentCareModel(id=id, parameters=parameters, trace_on=False, keep_patient_records=keep_patient_records)
+    model.simulate(sim_duration=sim_duration)
+
+    # each worker process writes its replications into the dataset
+    if export_directory is not None:
+        model.export_outputs(dataset=ReplicationDataset(directory=export_directory))
+
+    return ReplicationSummary(id=id, sim_outputs=model.simOutputs)
+
+
+class MultiUrgentCareModel:
+    def __init__(self, ids, parameters, keep_patient_records=True, export_directory=None):
+        """
+        :param ids: (list) of replication IDs (also used as the seed of each replication)
+        :param parameters: parameters of the urgent care model
+        :param keep_patient_records: set to False to only keep streaming statistics of patient times
+        :param export_directory: directory of a ReplicationDataset to write the patient records and
+                                 sample paths of replications into (None not to export)
+        """
+
+        self.ids = ids
+        self.params = parameters
+        self.keepPatientRecords = keep_patient_records
+        self.exportDirectory = export_directory
+        self.replicationSummaries = []  # summaries of replications (in the order of ids)
+
+    def simulate(self, sim_duration, n_processes=None, chunk_size=None, pool=None):
+        """ simulates all replications
+        :param sim_duration: duration of simulation (hours)
+        :param n_processes: number of worker processes (None to use all CPUs and 1 to simulate serially)
+        :param chunk_size: number of replications sent to a worker process at once
+                           (None to split replications into about 4 chunks per process)
+        :param pool: (multiprocessing.Pool) pool of worker processes to reuse
+                     (if not provided, a pool of n_processes is created and closed after simulation)
+        """
+
+        args = [(id, self.params, sim_duration, self.keepPatientRecords, self.exportDirectory) for id in self.ids]
+
+        if n_processes is None:
+            n_processes = mp.cpu_count()
+        if chunk_size is None:
+            chunk_size = max(1, len(args) // (4 * n_processes))
+
+        if pool is not None:
+            self.replicationSummaries = pool.map(simulate_replication, args, chunksize=chunk_size)
+        elif n_processes == 1:
+            self.replicationSummaries = [simulate_replication(arg) for arg in args]
+        else:
+            with mp.Pool(processes=n_processes) as pool:
+                self.replicationSummaries = pool.map(simulate_replication, args, chunksize=chunk_size)
+
+    def get_outcomes(self, attribute):
+        """
+        :param attribute: (string) name of an attribute of ReplicationSummary (e.g. 'aveWaitingTime')
+        :return: (list) the values of this attribute across replications
+        """
+
+        return [getattr(summary, attribute) for summary in self.replicationSummaries]
+
+    def get_pooled_stat(self, attribute):
+        """
+        :param attribute: (string) name of an OnlineStat attribute of ReplicationSummary (e.g. 'waitingTimeStat')
+        :return: (OnlineStat) statistics of patient observations pooled across all replications
+        """
+
+        pooled = OnlineStat(name=attribute)
+        for summary in self.replicationSummaries:
+            pooled.merge(getattr(summary, attribute))
+        return pooled
+
+
+class SequentialMultiUrgentCareModel:
+    # simulates batches of replications until the confidence intervals of the selected outcomes
+    # are narrow enough or the replication budget runs out
+
+    def __init__(self, parameters, outcomes, rel_half_width=None, abs_half_width=None, alpha=0.05,
+                 batch_size=20, max_replications=1000, keep_patient_records=False):
+        """
+        :param parameters: parameters of the urgent care model
+        :param outcomes: (list) of names of ReplicationSummary attributes (e.g. ['aveWaitingTime', 'aveMHWaitingTime'])
+        :param rel_half_width: target half-width of confidence intervals relative to the mean (e.g. 0.05)
+        :param abs_half_width: target half-width of confidence intervals
+                               (the precision is reached if either of the targets is met)
+        :param alpha: significance level of confidence intervals
+        :param batch_size: number of replications to simulate in each batch
+        :param max_replications: maximum number of replications to simulate
+        :param keep_patient_records: set to True to keep the record of each patient in replications
+        """
+
+        if rel_half_width is None and abs_half_width is None:
+            raise ValueError('Either rel_half_width or abs_half_width should be provided.')
+
+        self.params = parameters
+        self.outcomes = outcomes
+        self.relHalfWidth = rel_half_width
+        self.absHalfWidth = abs_half_width
+        self.alpha = alpha
+        self.batchSize = batch_size
+        self.maxReplications = max_replications
+        self.keepPatientRecords = keep_patient_records
+
+        self.replicationSummaries = []      # summaries of all replications simulated
+        self.ifPrecisionReached = False     # if the target precision is reached for all outcomes
+
+    def simulate(self, sim_duration, n_processes=None):
+        """ simulates batches of replications until the target precision or the maximum number of
+        replications is reached
+        :param sim_duration: duration of simulation (hours)
+        :param n_processes: number of worker processes (None to use all CPUs and 1 to simulate serially)
+        """
+
+        if n_processes is None:
+            n_processes = mp.cpu_count()
+
+        # the same worker processes are used for all batches
+        pool = mp.Pool(processes=n_processes) if n_processes > 1 else None
+
+        try:
+            while not self.ifPrecisionReached and len(self.replicationSummaries) < self.maxReplications:
+                first_id = len(self.replicationSummaries) + 1
+                n_reps = min(self.batchSize, self.maxReplications - len(self.replicationSummaries))
+
+                batch = MultiUrgentCareModel(ids=range(first_id, first_id + n_reps),
+                                             parameters=self.params,
+                                             keep_patient_records=self.keepPatientRecords)
+                batch.simulate(sim_duration=sim_duration, n_processes=n_processes, pool=pool)
+                self.replicationSummaries.extend(batch.replicationSummaries)
+
+                self.ifPrecisionReached = all(self.if_precision_reached(outcome) for outcome in self.outcomes)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+    def get_n_replications(self):
+        """ :returns: the number of replications simulated """
+        return len(self.replicationSummaries)
+
+    def get_mean_and_half_width(self, outcome):
+        """
+        :param outcome: (string) name of a ReplicationSummary attribute
+        :return: (tuple) the mean of this outcome across replications and the half-width of its
+                 t-based confidence interval (replications where the outcome is not defined are excluded)
+        """
+
+        return get_mean_and_half_width(
+            values=[getattr(summary, outcome) for summary in self.replicationSummaries], alpha=self.alpha)
+
+    def if_precision_reached(self, outcome):
+        """
+        :param outcome: (string) name of a ReplicationSummary attribute
+        :return: True if the confidence interval of this outcome is narrow enough
+        """
+
+        mean, half_width = self.get_mean_and_half_width(outcome=outcome)
+
+        if self.absHalfWidth is not None and half_width <= self.absHalfWidth:
+            return True
+        if self.relHalfWidth is not None and half_width <= self.relHalfWidth * abs(mean):
+            return True
+        return False
+
+
+def get_paired_differences(multi_model, other_multi_model, attribute):
+    """ replications of two scenarios with the same id use common random numbers
+    (the same arrivals and the same patients), so their differences vary less than
+    differences between independent replications
+    :param multi_model: (MultiUrgentCareModel) the base scenario
+    :param other_multi_model: (MultiUrgentCareModel) the alternative scenario simulated with the same ids
+    :param attribute: (string) name of an attribute of ReplicationSummary (e.g. 'aveWaitingTime')
+    :return: (list) the value of the attribute in the alternative minus its value in the base for each replication
+    """
+
+    if list(multi_model.ids) != list(other_multi_model.ids):
+        raise ValueError('Both scenarios should be simulated with the same replication ids.')
+
+    return [other - base for base, other in zip(multi_model.get_outcomes(attribute=attribute),
+                                                other_multi_model.get_outcomes(attribute=attribute))]
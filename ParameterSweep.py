@@ -0,0 +1,130 @@
+import itertools
+import multiprocessing as mp
+
+import numpy as np
+from deampy.in_out_functions import write_csv
+
+import ModelParameters as P
+from MultiUrgentCareModel import simulate_replication
+
+# outcomes of ReplicationSummary reported in the result table
+OUTCOMES = ('nPatientsArrived', 'nPatientsServed', 'nPatientsReceivedMHConsult',
+            'aveTimeInSystem', 'aveWaitingTime', 'aveMHWaitingTime',
+            'aveNumWaitingPCP', 'aveNumWaitingMH', 'aveNumInSystem', 'aveNumPCPBusy', 'aveNumMHSBusy')
+
+
+def get_grid_scenarios(grid):
+    """
+    :param grid: (dictionary) of values of parameters to sweep, where keys are arguments of Parameters
+                 (e.g. {'n_pcps': [8, 10, 12], 'mean_arrival_time': [1/50, 1/60]})
+    :return: (list) of dictionaries with one scenario for each combination of parameter values
+    """
+
+    names = list(grid.keys())
+    return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+
+
+def get_latin_hypercube_scenarios(ranges, n_scenarios, seed=0):
+    """
+    :param ranges: (dictionary) of [min, max] of parameters to sweep, where keys are arguments of Parameters
+                   (e.g. {'n_pcps': [8, 12], 'prob_depression': [0.05, 0.2]});
+                   parameters with integer bounds are sampled as integers
+    :param n_scenarios: number of scenarios
+    :param seed: seed of the random number generator
+    :return: (list) of dictionaries with one scenario from each stratum of the Latin hypercube design
+    """
+
+    rng = np.random.default_rng(seed)
+    scenarios = [{} for i in range(n_scenarios)]
+
+    for name, (low, high) in ranges.items():
+        # one point in each of n_scenarios equal strata, in random order
+        u = (rng.permutation(n_scenarios) + rng.random(n_scenarios)) / n_scenarios
+
+        if isinstance(low, int) and isinstance(high, int):
+            values = np.minimum(low + np.floor(u * (high - low + 1)), high).astype(int).tolist()
+        else:
+            values = (low + u * (high - low)).tolist()
+
+        for scenario, value in zip(scenarios, values):
+            scenario[name] = value
+
+    return scenarios
+
+
+class ParameterSweep:
+    # simulates replications of the urgent care model for many scenarios on one pool of worker processes
+
+    def __init__(self, scenarios, n_replications, keep_patient_records=False, common_random_numbers=True,
+                 first_id=1):
+        """
+        :param scenarios: (list) of dictionaries of arguments of Parameters (see get_grid_scenarios and
+                          get_latin_hypercube_scenarios)
+        :param n_replications: number of replications of each scenario
+        :param keep_patient_records: set to True to keep the record of each patient in replications
+        :param common_random_numbers: set to False to simulate each scenario with different replication ids
+                                      (so that the outcomes of scenarios are independent)
+        :param first_id: id of the first replication
+        """
+
+        self.scenarios = scenarios
+        self.nReplications = n_replications
+        self.keepPatientRecords = keep_patient_records
+        self.commonRandomNumbers = common_random_numbers
+        self.firstId = first_id
+        self.replicationSummaries = []  # (list of lists) summaries of replications of each scenario
+
+    def simulate(self, sim_duration, n_processes=None, chunk_size=None):
+        """ simulates all (scenario, replication) pairs
+        :param sim_duration: duration of simulation (hours)
+        :param n_processes: number of worker processes (None to use all CPUs and 1 to simulate serially)
+        :param chunk_size: number of replications sent to a worker process at once
+                           (None to split replications into about 4 chunks per process)
+        """
+
+        # replications of different scenarios with the same id use common random numbers
+        args = []
+        for i, scenario in enumerate(self.scenarios):
+            params = P.Parameters(**scenario)
+            first_id = self.firstId if self.commonRandomNumbers else self.firstId + i * self.nReplications
+            for id in range(first_id, first_id + self.nReplications):
+                args.append((id, params, sim_duration, self.keepPatientRecords, None))
+
+        if n_processes is None:
+            n_processes = mp.cpu_count()
+
+        if n_processes == 1:
+            summaries = [simulate_replication(arg) for arg in args]
+        else:
+            if chunk_size is None:
+                chunk_size = max(1, len(args) // (4 * n_processes))
+
+            # the same worker processes simulate all scenarios
+            with mp.Pool(processes=n_processes) as pool:
+                summaries = pool.map(simulate_replication, args, chunksize=chunk_size)
+
+        self.replicationSummaries = [summaries[i:i + self.nReplications]
+                                     for i in range(0, len(summaries), self.nReplications)]
+
+    def get_table(self):
+        """
+        :return: (list of lists) one row for each (scenario, replication) with the scenario index,
+                 the values of swept parameters, the replication id, and the outcomes (the first row is the header)
+        """
+
+        names = sorted(set(name for scenario in self.scenarios for name in scenario))
+
+        table = [['scenario'] + names + ['replication'] + list(OUTCOMES)]
+        for i, (scenario, summaries) in enumerate(zip(self.scenarios, self.replicationSummaries)):
+            for summary in summaries:
+                table.append([i] + [scenario.get(name) for name in names] + [summary.id]
+                             + [getattr(summary, outcome) for outcome in OUTCOMES])
+        return table
+
+    def write_table(self, file_name, directory='Sweep'):
+        """ writes the result table into a csv file
+        :param file_name: name of the csv file
+        :param directory: directory (relative to the current root) where the file should be located
+        """
+
+        write_csv(rows=self.get_table(), file_name=file_name, directory=directory)
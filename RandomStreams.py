@@ -0,0 +1,171 @@
+import numpy as np
+
+BLOCK_SIZE = 1000   # number of realizations drawn at once when a buffer runs out
+
+
+class _BufferedSampler:
+    def __init__(self, rng, block_size):
+        """ buffers realizations of a distribution drawn in blocks with a single vectorized call
+        :param rng: random number generator (numpy.random.Generator) of this sampler's sub-stream
+        :param block_size: number of realizations to draw when the buffer runs out
+        """
+
+        self.rng = rng
+        self.blockSize = block_size
+        self._block = np.empty(0)   # realizations of the current block (to take several at once)
+        self._buffer = []   # realizations not used yet
+        self._i = 0         # index of the next realization in the buffer
+
+    def sample(self):
+        """ :returns: the next realization (the buffer is refilled if needed) """
+
+        if self._i == len(self._buffer):
+            self._refill()
+
+        value = self._buffer[self._i]
+        self._i += 1
+        return value
+
+    def sample_array(self, n):
+        """
+        :param n: number of realizations
+        :return: (numpy.array) the next n realizations (the same realizations as n calls to sample)
+        """
+
+        values = []
+        while n > 0:
+            if self._i == len(self._buffer):
+                self._refill()
+            n_taken = min(n, len(self._buffer) - self._i)
+            values.append(self._block[self._i:self._i + n_taken])
+            self._i += n_taken
+            n -= n_taken
+
+        return np.concatenate(values) if len(values) > 0 else self._block[:0]
+
+    def sample_cumulative(self, start, end):
+        """
+        :param start: value to start accumulating realizations from
+        :param end: value to accumulate realizations until
+        :return: (numpy.array) start plus the cumulative sums of the next realizations, up to and including
+                 the first sum that is greater than end (the same values as adding realizations drawn by
+                 sample one at a time)
+        """
+
+        sums = []
+        while True:
+            if self._i == len(self._buffer):
+                self._refill()
+            values = self._block[self._i:].copy()
+            values[0] += start
+            # numpy accumulates from left to right, so each sum is rounded as in sequential additions
+            values = np.cumsum(values)
+
+            n_taken = int(np.searchsorted(values, end, side='right'))
+            if n_taken < len(values):
+                sums.append(values[:n_taken + 1])
+                self._i += n_taken + 1
+                return np.concatenate(sums)
+
+            sums.append(values)
+            self._i = len(self._buffer)
+            start = values[-1]
+
+    def _refill(self):
+        """ draws a new block of realizations into the buffer """
+
+        self._block = self._draw_block()
+        self._buffer = self._block.tolist()
+        self._i = 0
+
+    def _draw_block(self):
+        """ :returns: (numpy.array) a new block of realizations
+        abstract method to be overridden in derived classes """
+
+        raise NotImplementedError("This is an abstract method and needs to be implemented in derived classes.")
+
+
+class BufferedExponential(_BufferedSampler):
+    def __init__(self, scale, rng, block_size=BLOCK_SIZE, loc=0):
+        """
+        :param scale: mean of the exponential distribution (before shifting by loc)
+        :param rng: random number generator (numpy.random.Generator) of this sampler's sub-stream
+        :param block_size: number of realizations to draw when the buffer runs out
+        :param loc: location (shift) of the exponential distribution
+        """
+
+        _BufferedSampler.__init__(self, rng=rng, block_size=block_size)
+        self.scale = scale
+        self.loc = loc
+
+    def _draw_block(self):
+        return self.rng.exponential(scale=self.scale, size=self.blockSize) + self.loc
+
+
+class BufferedBernoulli(_BufferedSampler):
+    def __init__(self, p, rng, block_size=BLOCK_SIZE):
+        """
+        :param p: probability of success
+        :param rng: random number generator (numpy.random.Generator) of this sampler's sub-stream
+        :param block_size: number of realizations to draw when the buffer runs out
+        """
+
+        _BufferedSampler.__init__(self, rng=rng, block_size=block_size)
+        self.p = p
+
+    def _draw_block(self):
+        # realizations are returned as bool
+        return self.rng.random(size=self.blockSize) < self.p
+
+
+class BufferedCategorical(_BufferedSampler):
+    def __init__(self, probs, rng, block_size=BLOCK_SIZE):
+        """
+        :param probs: (list) probability of each category (categories are 0, 1, ...)
+        :param rng: random number generator (numpy.random.Generator) of this sampler's sub-stream
+        :param block_size: number of realizations to draw when the buffer runs out
+        """
+
+        _BufferedSampler.__init__(self, rng=rng, block_size=block_size)
+        self.probs = probs
+
+    def _draw_block(self):
+        return self.rng.choice(len(self.probs), size=self.blockSize, p=self.probs)
+
+
+class RandomStreams:
+    def __init__(self, seed, parameters, block_size=BLOCK_SIZE):
+        """ creates one buffered sampler (with its own random number sub-stream) for each source of randomness
+        (sub-streams only depend on the seed, so scenarios simulated with the same seed
+        use common random numbers)
+        :param seed: seed of this simulation replication
+        :param parameters: parameters of the urgent care model
+        :param block_size: number of realizations to draw at once
+        """
+
+        # spawn independent sub-streams from the seed of this replication
+        arrival_seed, depression_seed, exam_seed, mh_consult_seed, priority_seed = \
+            np.random.SeedSequence(seed).spawn(5)
+
+        # time until the next arrival
+        self.arrivalTime = BufferedExponential(scale=parameters.meanArrivalTime,
+                                               rng=np.random.default_rng(arrival_seed),
+                                               block_size=block_size)
+        # if the patient has depression
+        self.depression = BufferedBernoulli(p=parameters.probDepression,
+                                            rng=np.random.default_rng(depression_seed),
+                                            block_size=block_size)
+        # exam durations
+        self.examTime = BufferedExponential(scale=parameters.meanExamDuration,
+                                            rng=np.random.default_rng(exam_seed),
+                                            block_size=block_size)
+        # durations of mental health consultation
+        self.mhConsultTime = BufferedExponential(scale=parameters.meanMHConsult,
+                                                 rng=np.random.default_rng(mh_consult_seed),
+                                                 block_size=block_size)
+        # priority class of the patient (None if patients have no priority classes)
+        self.priority = None
+        if parameters.priorityProbs is not None:
+            self.priority = BufferedCategorical(probs=parameters.priorityProbs,
+                                                rng=np.random.default_rng(priority_seed),
+                                                block_size=block_size)
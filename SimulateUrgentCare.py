@@ -1,77 +1,142 @@
-import deampy.plots.histogram as hist
-import deampy.plots.sample_paths as path
+import argparse
 
 import InputData as D
 import ModelParameters as P
 import UrgentCareModel as M
+from ModelStatistics import TimeWeightedSamplePath
 
-# create an urgent care model
-urgentCareModel = M.UrgentCareModel(id=1, parameters=P.Parameters())
-
-# simulate the urgent care
-urgentCareModel.simulate(sim_duration=D.SIM_DURATION)
-
-print('Total patients arrived:', urgentCareModel.urgentCare.simOutputs.nPatientsArrived)
-print('Total patients served:', urgentCareModel.urgentCare.simOutputs.nPatientsServed)
-print('Patients received mental health consultation', urgentCareModel.urgentCare.simOutputs.nPatientsReceivedMHConsult)
-
-print('Average patient time in system:', urgentCareModel.simOutputs.get_ave_patient_time_in_system())
-print('Average patient waiting time:', urgentCareModel.simOutputs.get_ave_patient_waiting_time())
-print('Average patient wait time for MHS:', urgentCareModel.simOutputs.get_ave_patient_mh_waiting_time())
-
-# sample path for patients in the system
-path.plot_sample_path(
-    sample_path=urgentCareModel.simOutputs.nPatientInSystem,
-    title='Patients In System',
-    x_label='Simulation time (hours)',
-)
-
-# sample path for patients waiting to see a physician
-path.plot_sample_path(
-    sample_path=urgentCareModel.simOutputs.nPatientsWaitingPCP,
-    title='Patients Waiting to See a PCP',
-    x_label='Simulation time (hours)',
-)
-
-# sample path for patients waiting to see MHS
-path.plot_sample_path(
-    sample_path=urgentCareModel.simOutputs.nPatientsWaitingMH,
-    title='Patients Waiting to see MHS',
-    x_label='Simulation time (hours)',
-)
-
-# sample path for utilization of PCP
-path.plot_sample_path(
-    sample_path=urgentCareModel.simOutputs.nPCPBusy,
-    title='Utilization of PCP',
-    x_label='Simulation time (hours)'
-)
-
-# sample path for utilization of MHS
-path.plot_sample_path(
-    sample_path=urgentCareModel.simOutputs.nMHSBusy,
-    title='Utilization of MHS',
-    x_label='Simulation time (hours)'
-)
-
-hist.plot_histogram(
-    data=urgentCareModel.simOutputs.patientTimeInSystem,
-    title='Patients Time in System',
-    x_label='Hours',
-    #bin_width=.2
-)
-hist.plot_histogram(
-    data=urgentCareModel.simOutputs.patientTimeInPCPWaitingRoom,
-    title='Patients Time in PCP Waiting Room',
-    x_label='Hours',
-    #bin_width=0.2
-)
-hist.plot_histogram(
-    data=urgentCareModel.simOutputs.patientTimeInMHWaitingRoom,
-    title='Patients Time in MHS Waiting Room',
-    x_label='Hours',
-    #bin_width=0.2
-)
-
-# print trace
-urgentCareModel.print_trace()
+# maximum number of points kept in the trajectory of sample paths in headless mode
+# (only the time-weighted means are reported, which are exact regardless of this number)
+HEADLESS_SAMPLE_PATH_MAX_POINTS = 100
+
+
+def print_summary(urgent_care_model):
+    """ prints the numeric summary of a simulated urgent care
+    :param urgent_care_model: a simulated urgent care model
+    """
+
+    print('Total patients arrived:', urgent_care_model.simOutputs.nPatientsArrived)
+    print('Total patients served:', urgent_care_model.simOutputs.nPatientsServed)
+    print('Patients received mental health consultation', urgent_care_model.simOutputs.nPatientsReceivedMHConsult)
+
+    print('Average patient time in system:', urgent_care_model.simOutputs.get_ave_patient_time_in_system())
+    print('Average patient waiting time:', urgent_care_model.simOutputs.get_ave_patient_waiting_time())
+    print('Average patient wait time for MHS:', urgent_care_model.simOutputs.get_ave_patient_mh_waiting_time())
+
+
+def get_plottable_sample_path(sample_path):
+    """
+    :param sample_path: a sample path of SimOutputs
+    :return: the sample path as deampy's PrevalenceSamplePath (which deampy.plots.sample_paths requires)
+    """
+
+    if isinstance(sample_path, TimeWeightedSamplePath):
+        return sample_path.to_prevalence_sample_path()
+    return sample_path
+
+
+def plot_outputs(urgent_care_model):
+    """ plots the sample paths and histograms of a simulated urgent care
+    :param urgent_care_model: a simulated urgent care model
+    """
+
+    # plotting modules are imported only when plots are requested
+    import deampy.plots.histogram as hist
+    import deampy.plots.sample_paths as path
+
+    # sample path for patients in the system
+    path.plot_sample_path(
+        sample_path=get_plottable_sample_path(urgent_care_model.simOutputs.nPatientInSystem),
+        title='Patients In System',
+        x_label='Simulation time (hours)',
+    )
+
+    # sample path for patients waiting to see a physician
+    path.plot_sample_path(
+        sample_path=get_plottable_sample_path(urgent_care_model.simOutputs.nPatientsWaitingPCP),
+        title='Patients Waiting to See a PCP',
+        x_label='Simulation time (hours)',
+    )
+
+    # sample path for patients waiting to see MHS
+    path.plot_sample_path(
+        sample_path=get_plottable_sample_path(urgent_care_model.simOutputs.nPatientsWaitingMH),
+        title='Patients Waiting to see MHS',
+        x_label='Simulation time (hours)',
+    )
+
+    # sample path for utilization of PCP
+    path.plot_sample_path(
+        sample_path=get_plottable_sample_path(urgent_care_model.simOutputs.nPCPBusy),
+        title='Utilization of PCP',
+        x_label='Simulation time (hours)'
+    )
+
+    # sample path for utilization of MHS
+    path.plot_sample_path(
+        sample_path=get_plottable_sample_path(urgent_care_model.simOutputs.nMHSBusy),
+        title='Utilization of MHS',
+        x_label='Simulation time (hours)'
+    )
+
+    hist.plot_histogram(
+        data=urgent_care_model.simOutputs.patientTimeInSystem,
+        title='Patients Time in System',
+        x_label='Hours',
+        #bin_width=.2
+    )
+    hist.plot_histogram(
+        data=urgent_care_model.simOutputs.patientTimeInPCPWaitingRoom,
+        title='Patients Time in PCP Waiting Room',
+        x_label='Hours',
+        #bin_width=0.2
+    )
+    hist.plot_histogram(
+        data=urgent_care_model.simOutputs.patientTimeInMHWaitingRoom,
+        title='Patients Time in MHS Waiting Room',
+        x_label='Hours',
+        #bin_width=0.2
+    )
+
+
+def main(args=None):
+    """ simulates the urgent care and reports its outputs
+    :param args: (list) of command-line arguments (if None, sys.argv is used)
+    """
+
+    parser = argparse.ArgumentParser(description='Simulates the urgent care model.')
+    parser.add_argument('--headless', action='store_true',
+                        help='only print the numeric summary (no plots, trace or patient summary files)')
+    parser.add_argument('--trace', action='store_true',
+                        help='write the trace and patient summary files in headless mode')
+    parser.add_argument('--id', type=int, default=1,
+                        help='ID of the urgent care model (also used as the seed)')
+    parser.add_argument('--sim-duration', type=float, default=D.SIM_DURATION,
+                        help='duration of simulation (hours)')
+    args = parser.parse_args(args)
+
+    # create an urgent care model
+    if args.headless:
+        # only keep what the numeric summary (and the trace if requested) needs
+        urgent_care_model = M.UrgentCareModel(id=args.id, parameters=P.Parameters(),
+                                              trace_on=args.trace,
+                                              keep_patient_records=args.trace,
+                                              sample_path_max_points=HEADLESS_SAMPLE_PATH_MAX_POINTS)
+    else:
+        urgent_care_model = M.UrgentCareModel(id=args.id, parameters=P.Parameters())
+
+    # simulate the urgent care
+    urgent_care_model.simulate(sim_duration=args.sim_duration)
+
+    print_summary(urgent_care_model=urgent_care_model)
+
+    if not args.headless:
+        plot_outputs(urgent_care_model=urgent_care_model)
+
+    # print trace
+    if not args.headless or args.trace:
+        urgent_care_model.print_trace()
+
+
+if __name__ == '__main__':
+    main()
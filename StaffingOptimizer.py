@@ -0,0 +1,209 @@
+import math
+import multiprocessing as mp
+
+import ModelParameters as P
+from MultiUrgentCareModel import get_mean_and_half_width, simulate_replication
+
+# decisions about staffing levels
+FEASIBLE = 'feasible'
+INFEASIBLE = 'infeasible'
+UNDECIDED = 'undecided'     # the replication budget ran out before the target could be met or rejected
+
+# outcomes of ReplicationSummary that need the records of patients
+RECORD_OUTCOMES = ('p90WaitingTime',)
+
+
+class StaffingOptimizer:
+    # finds the minimum number of PCPs for which the expected value of an outcome (e.g. the mean or the 90th
+    # percentile of patient waiting time for a PCP) is not above a target.
+    # The outcome is assumed to decrease with the number of PCPs, so staffing levels are searched by bisection
+    # (or by evaluating several levels of the remaining interval at once). Each level is simulated in batches of
+    # replications until the confidence interval of the outcome falls entirely below or above the target,
+    # so levels that are clearly feasible or infeasible only need a few replications. All levels are simulated
+    # with the same replication ids (common random numbers), and the replications of the levels evaluated
+    # in a round are simulated together on one pool of worker processes.
+
+    def __init__(self, target, outcome='aveWaitingTime', parameters=None, min_pcps=1, max_pcps=None,
+                 alpha=0.05, batch_size=10, max_replications=200, n_candidates=None):
+        """
+        :param target: the maximum acceptable expected value of the outcome
+        :param outcome: (string) name of a ReplicationSummary attribute
+                        ('aveWaitingTime' for the mean and 'p90WaitingTime' for the 90th percentile of
+                        patient waiting time for a PCP in a replication)
+        :param parameters: (dictionary) of arguments of Parameters other than n_pcps (None to use InputData)
+        :param min_pcps: minimum number of PCPs to consider
+        :param max_pcps: maximum number of PCPs to consider (if None, 2 * InputData.N_PCP)
+        :param alpha: probability that the decision about any of the levels evaluated is wrong
+                      (Bonferroni-adjusted over the maximum number of levels the search can evaluate;
+                      since confidence intervals are checked after each batch, the guarantee is approximate)
+        :param batch_size: number of replications added to a level at a time
+        :param max_replications: maximum number of replications of a level (the level is undecided and
+                                 treated as infeasible if its confidence interval still contains the target)
+        :param n_candidates: number of levels evaluated in each round of the search
+                             (None to use the number of worker processes, 1 for bisection)
+        """
+
+        self.target = target
+        self.outcome = outcome
+        self.params = {} if parameters is None else parameters
+        self.minPCPs = min_pcps
+        self.maxPCPs = 2 * P.Parameters().nPCPs if max_pcps is None else max_pcps
+        self.alpha = alpha
+        self.batchSize = batch_size
+        self.maxReplications = max_replications
+        self.nCandidates = n_candidates
+
+        self.replicationSummaries = {}  # number of PCPs -> (list) summaries of replications of this level
+        self.decisions = {}             # number of PCPs -> decision (FEASIBLE, INFEASIBLE or UNDECIDED)
+        self.adjustedAlpha = alpha      # significance level of the confidence interval of each level
+        self.optimalPCPs = None         # minimum number of PCPs that meets the target (None if not found)
+
+    def optimize(self, sim_duration, n_processes=None):
+        """ searches for the minimum number of PCPs that meets the target
+        :param sim_duration: duration of simulation (hours)
+        :param n_processes: number of worker processes (None to use all CPUs and 1 to simulate serially)
+        :return: the minimum number of PCPs that meets the target
+                 (None if the target is not met with the maximum number of PCPs)
+        """
+
+        if n_processes is None:
+            n_processes = mp.cpu_count()
+        n_candidates = n_processes if self.nCandidates is None else self.nCandidates
+        self.adjustedAlpha = self.alpha / self.get_max_n_evaluations(n_candidates=n_candidates)
+
+        # the same worker processes are used for all rounds
+        pool = mp.Pool(processes=n_processes) if n_processes > 1 else None
+
+        try:
+            # the target should be met with the maximum number of PCPs
+            self._evaluate(levels=[self.maxPCPs], sim_duration=sim_duration,
+                           n_processes=n_processes, pool=pool)
+            if self.decisions[self.maxPCPs] != FEASIBLE:
+                self.optimalPCPs = None
+                return None
+
+            # levels up to low do not meet the target and high meets the target
+            low, high = self.minPCPs - 1, self.maxPCPs
+            while high - low > 1:
+                levels = self._get_candidates(low=low, high=high, n_candidates=n_candidates)
+                self._evaluate(levels=levels, sim_duration=sim_duration,
+                               n_processes=n_processes, pool=pool)
+
+                # undecided levels are treated as infeasible (so the level returned meets the target)
+                for n_pcps in levels:
+                    if self.decisions.get(n_pcps) == FEASIBLE:
+                        high = min(high, n_pcps)
+                for n_pcps in levels:
+                    if n_pcps < high and self.decisions.get(n_pcps) in (INFEASIBLE, UNDECIDED):
+                        low = max(low, n_pcps)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        self.optimalPCPs = high
+        return high
+
+    def get_max_n_evaluations(self, n_candidates):
+        """
+        :param n_candidates: number of levels evaluated in each round of the search
+        :return: the maximum number of levels the search can evaluate (to adjust the significance level)
+        """
+
+        n_levels = self.maxPCPs - self.minPCPs + 1
+        if n_levels <= 1:
+            return 1
+        # each round reduces the interval of n_levels levels to 1 / (n_candidates + 1) of its size
+        n_rounds = math.ceil(math.log(n_levels) / math.log(n_candidates + 1))
+        return 1 + n_candidates * n_rounds
+
+    def get_n_replications(self):
+        """ :returns: the total number of replications simulated """
+
+        return sum(len(summaries) for summaries in self.replicationSummaries.values())
+
+    def get_mean_and_half_width(self, n_pcps):
+        """
+        :param n_pcps: number of PCPs
+        :return: (tuple) the mean of the outcome with this number of PCPs and the half-width of its
+                 t-based confidence interval (at the adjusted significance level used to decide levels)
+        """
+
+        return get_mean_and_half_width(
+            values=[getattr(summary, self.outcome) for summary in self.replicationSummaries.get(n_pcps, [])],
+            alpha=self.adjustedAlpha)
+
+    def print_summary(self):
+        """ prints the outcome, the number of replications and the decision for each level evaluated """
+
+        print('{} (target {}):'.format(self.outcome, self.target))
+        for n_pcps in sorted(self.decisions):
+            mean, half_width = self.get_mean_and_half_width(n_pcps=n_pcps)
+            print('  {:3d} PCPs: {:10.5f} +/- {:8.5f} {:5d} replications  {}'.format(
+                n_pcps, mean, half_width, len(self.replicationSummaries[n_pcps]), self.decisions[n_pcps]))
+        print('Minimum number of PCPs:', self.optimalPCPs)
+        print('Total replications:', self.get_n_replications())
+
+    def _get_candidates(self, low, high, n_candidates):
+        """
+        :return: (list) up to n_candidates levels evenly spaced between low and high (exclusive)
+        """
+
+        n_candidates = min(n_candidates, high - low - 1)
+        levels = [low + round((high - low) * (k + 1) / (n_candidates + 1)) for k in range(n_candidates)]
+        return sorted(set(level for level in levels if low < level < high))
+
+    def _evaluate(self, levels, sim_duration, n_processes, pool):
+        """ simulates batches of replications of levels until each level is decided, or is no longer needed
+        since a higher level was found infeasible or a lower level was found feasible
+        :param levels: (list) numbers of PCPs
+        (see optimize for the description of other parameters)
+        """
+
+        keep_patient_records = self.outcome in RECORD_OUTCOMES
+        pending = [n_pcps for n_pcps in levels if n_pcps not in self.decisions]
+
+        while len(pending) > 0:
+            # the next batch of replications of all pending levels
+            # (replications of different levels with the same id use common random numbers)
+            args = []
+            for n_pcps in pending:
+                params = P.Parameters(n_pcps=n_pcps, **self.params)
+                first_id = len(self.replicationSummaries.get(n_pcps, [])) + 1
+                n_reps = min(self.batchSize, self.maxReplications - first_id + 1)
+                for id in range(first_id, first_id + n_reps):
+                    args.append((id, params, sim_duration, keep_patient_records, None))
+
+            if pool is None:
+                summaries = [simulate_replication(arg) for arg in args]
+            else:
+                summaries = pool.map(simulate_replication, args,
+                                     chunksize=max(1, len(args) // (4 * n_processes)))
+
+            i = 0
+            for n_pcps in pending:
+                n_reps = min(self.batchSize, self.maxReplications - len(self.replicationSummaries.get(n_pcps, [])))
+                self.replicationSummaries.setdefault(n_pcps, []).extend(summaries[i:i + n_reps])
+                i += n_reps
+                self._decide(n_pcps=n_pcps)
+
+            # the outcome decreases with the number of PCPs, so levels above a feasible level
+            # and levels below an infeasible level are not needed
+            decided = [n_pcps for n_pcps in levels if n_pcps in self.decisions]
+            lowest_feasible = min((n for n in decided if self.decisions[n] == FEASIBLE), default=math.inf)
+            highest_infeasible = max((n for n in decided if self.decisions[n] == INFEASIBLE), default=-math.inf)
+            pending = [n_pcps for n_pcps in pending
+                       if n_pcps not in self.decisions and highest_infeasible < n_pcps < lowest_feasible]
+
+    def _decide(self, n_pcps):
+        """ decides if a level meets the target once its confidence interval excludes the target
+        (or the replication budget runs out) """
+
+        mean, half_width = self.get_mean_and_half_width(n_pcps=n_pcps)
+
+        if mean + half_width <= self.target:
+            self.decisions[n_pcps] = FEASIBLE
+        elif mean - half_width > self.target:
+            self.decisions[n_pcps] = INFEASIBLE
+        elif len(self.replicationSummaries[n_pcps]) >= self.maxReplications:
+            self.decisions[n_pcps] = UNDECIDED
@@ -1,70 +1,209 @@
-import numpy as np
-from deampy.discrete_event_sim import SimulationCalendar
+import math
+import os
+import pickle
+import time
+
 from deampy.in_out_functions import write_csv
-from deampy.support.simulation import DiscreteEventSimTrace
 
 import InputData as D
-from ModelEntities import UrgentCare, Patient
-from ModelEvents import CloseUrgentCare, Arrival
+from ModelCalendar import UrgentCareCalendar
+from ModelEntities import UrgentCare
+from ModelEvents import CloseUrgentCare, EndOfWarmUp, EndOfBatch
 from ModelOutputs import SimOutputs
+from ModelTrace import UrgentCareTrace
+from RandomStreams import RandomStreams
 
 
 class UrgentCareModel:
-    def __init__(self, id, parameters):
+    def __init__(self, id, parameters, trace_on=None, trace_categories=None, keep_patient_records=True,
+                 sample_path_max_points=None, warm_up_period=0, batch_length=None, recycle_objects=False,
+                 arrival_stream=False):
         """
         :param id: ID of this urgent care model
         :param parameters: parameters of this model
+        :param trace_on: set to True to trace this replication (if None, InputData.TRACE_ON is used)
+        :param trace_categories: (list) of categories of trace messages to record
+                                 (if None, InputData.TRACE_CATEGORIES is used)
+        :param keep_patient_records: set to False to only keep streaming statistics of patient times
+                                     (print_trace then does not write the patient summary)
+        :param sample_path_max_points: maximum number of points kept in the trajectory of each sample path
+                                       (None to keep every change)
+        :param warm_up_period: (hours) observations collected before this time are deleted
+        :param batch_length: (hours) length of batches to record the means of outputs over (e.g. 24 for daily means;
+                             None not to record batch means)
+        (for a long multi-day run, memory stays bounded if keep_patient_records is False and
+        sample_path_max_points is set)
+        :param recycle_objects: set to True to reuse event and patient objects instead of creating new ones
+        :param arrival_stream: set to True to generate the arrivals of each day at once instead of
+                               scheduling one arrival event per patient (the results are identical)
         """
 
+        if trace_on is None:
+            trace_on = D.TRACE_ON
+        if trace_categories is None:
+            trace_categories = D.TRACE_CATEGORIES
+
         self.id = id
         self.params = parameters    # model parameters
+        self.traceOn = trace_on
+        self.traceCategories = trace_categories
+        self.keepPatientRecords = keep_patient_records
+        self.samplePathMaxPoints = sample_path_max_points
+        self.warmUpPeriod = warm_up_period
+        self.batchLength = batch_length
+        self.recycleObjects = recycle_objects
+        self.arrivalStream = arrival_stream
         self.simCal = None          # simulation calendar
         self.simOutputs = None      # simulation outputs
         self.trace = None           # simulation trace
         self.urgentCare = None      # urgent care
+        self.rng = None             # random streams
 
-    def simulate(self, sim_duration):
+    def simulate(self, sim_duration, profiler=None,
+                 checkpoint_file=None, checkpoint_interval=None, checkpoint_wall_interval=None):
         """ simulate the urgent care
         :param sim_duration: duration of simulation (hours)
+        :param profiler: (SimProfiler) to record the count and time of operations during the simulation
+        :param checkpoint_file: file to save the state of the simulation into (see resume)
+        :param checkpoint_interval: simulation time (hours) between checkpoints
+        :param checkpoint_wall_interval: wall-clock time (seconds) between checkpoints
          """
 
-        # random number generator
-        rng = np.random.RandomState(seed=self.id)
+        # intervals between checkpoints should be positive
+        # (the checkpoint time would never pass the next event with a simulation interval that is not)
+        if checkpoint_interval is not None and checkpoint_interval <= 0:
+            raise ValueError('checkpoint_interval should be positive.')
+        if checkpoint_wall_interval is not None and checkpoint_wall_interval <= 0:
+            raise ValueError('checkpoint_wall_interval should be positive.')
+
+        # random streams (one buffered sub-stream for each source of randomness)
+        self.rng = RandomStreams(seed=self.id, parameters=self.params)
 
         # initialize the simulation
-        self.__initialize(rng=rng)
+        self.__initialize(rng=self.rng)
 
-        # while there is an event scheduled in the simulation calendar
+        # process events while there is an event scheduled in the simulation calendar
         # and the simulation time is less than the simulation duration
-        while self.simCal.n_events() > 0 and self.simCal.time <= sim_duration:
-            self.simCal.get_next_event().process(rng=rng)
+        if checkpoint_file is not None:
+            if profiler is not None:
+                raise ValueError('A simulation with checkpoints cannot be profiled.')
+            self.__process_events_with_checkpoints(
+                sim_duration=sim_duration, checkpoint_file=checkpoint_file,
+                checkpoint_interval=checkpoint_interval, checkpoint_wall_interval=checkpoint_wall_interval,
+                next_checkpoint_time=checkpoint_interval)
+        elif profiler is None:
+            self.simCal.process_events(sim_duration=sim_duration, rng=self.rng)
+        else:
+            profiler.instrument(sim_cal=self.simCal, sim_out=self.simOutputs, trace=self.trace)
+            profiler.process_events(sim_cal=self.simCal, urgent_care=self.urgentCare,
+                                    sim_duration=sim_duration, rng=self.rng)
 
         # collect the end of simulation statistics
         self.simOutputs.collect_end_of_simulation()
 
+    @staticmethod
+    def resume(checkpoint_file):
+        """ continues a simulation from the last checkpoint saved by simulate
+        (the results are identical to those of a simulation that was not interrupted)
+        :param checkpoint_file: file the state of the simulation was saved into
+        :return: the urgent care model after the simulation is finished
+        """
+
+        with open(checkpoint_file, 'rb') as file:
+            model, sim_duration, checkpoint_interval, checkpoint_wall_interval, next_checkpoint_time = pickle.load(file)
+
+        model.__process_events_with_checkpoints(
+            sim_duration=sim_duration, checkpoint_file=checkpoint_file,
+            checkpoint_interval=checkpoint_interval, checkpoint_wall_interval=checkpoint_wall_interval,
+            next_checkpoint_time=next_checkpoint_time)
+
+        # collect the end of simulation statistics
+        model.simOutputs.collect_end_of_simulation()
+
+        return model
+
+    def __process_events_with_checkpoints(self, sim_duration, checkpoint_file,
+                                          checkpoint_interval, checkpoint_wall_interval, next_checkpoint_time):
+        """ processes events and saves the state of the simulation at simulation-time or wall-clock intervals
+        (see simulate for the description of parameters)
+        :param next_checkpoint_time: simulation time of the next checkpoint (None if checkpoints are not
+                                     saved at simulation-time intervals)
+        """
+
+        # number of events processed between checks of the wall clock
+        n_events_between_checks = 1000 if checkpoint_wall_interval is not None else None
+
+        last_checkpoint_wall_time = time.perf_counter()
+        if_finished = False
+        while not if_finished:
+            if_finished = self.simCal.process_events_until(
+                sim_duration=sim_duration, rng=self.rng,
+                pause_time=next_checkpoint_time if next_checkpoint_time is not None else math.inf,
+                max_events=n_events_between_checks)
+
+            if if_finished:
+                break
+
+            if_should_save = False
+            if next_checkpoint_time is not None and self.simCal.peek_time() >= next_checkpoint_time:
+                # the next event is at or after the checkpoint time
+                while next_checkpoint_time <= self.simCal.peek_time():
+                    next_checkpoint_time += checkpoint_interval
+                if_should_save = True
+            if checkpoint_wall_interval is not None \
+                    and time.perf_counter() - last_checkpoint_wall_time >= checkpoint_wall_interval:
+                if_should_save = True
+
+            if if_should_save:
+                self.__save_checkpoint(
+                    checkpoint_file=checkpoint_file,
+                    state=(self, sim_duration, checkpoint_interval, checkpoint_wall_interval, next_checkpoint_time))
+                last_checkpoint_wall_time = time.perf_counter()
+
+    @staticmethod
+    def __save_checkpoint(checkpoint_file, state):
+        """ saves the state of the simulation (the calendar, urgent care, waiting rooms, physicians,
+        outputs, trace, and random streams are all reachable from the model)
+        :param checkpoint_file: file to save the state into
+        :param state: (tuple) the model and the arguments needed to continue the simulation
+        """
+
+        # write to a temporary file first so that a crash while saving does not corrupt the last checkpoint
+        with open(checkpoint_file + '.tmp', 'wb') as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(checkpoint_file + '.tmp', checkpoint_file)
+
     def __initialize(self, rng):
         """ initialize the simulation model
-        :param rng: random number generator
+        :param rng: random streams of this replication
         """
 
         # simulation calendar
-        self.simCal = SimulationCalendar()
+        self.simCal = UrgentCareCalendar()
 
         # simulation outputs
         self.simOutputs = SimOutputs(sim_cal=self.simCal,
-                                     trace_on=D.TRACE_ON)
+                                     trace_on=self.traceOn,
+                                     keep_patient_records=self.keepPatientRecords,
+                                     sample_path_max_points=self.samplePathMaxPoints,
+                                     warm_up_period=self.warmUpPeriod,
+                                     batch_length=self.batchLength,
+                                     recycle_patients=self.recycleObjects)
 
         # simulation trace
-        self.trace = DiscreteEventSimTrace(sim_calendar=self.simCal,
-                                           if_should_trace=D.TRACE_ON,
-                                           deci=D.DECI)
+        self.trace = UrgentCareTrace(sim_calendar=self.simCal,
+                                     if_should_trace=self.traceOn,
+                                     deci=D.DECI,
+                                     categories=self.traceCategories)
 
         # urgent care
         self.urgentCare = UrgentCare(id=id,
                                      parameters=self.params,
                                      sim_cal=self.simCal,
                                      sim_out=self.simOutputs,
-                                     trace=self.trace)
+                                     trace=self.trace,
+                                     recycle_objects=self.recycleObjects,
+                                     arrival_stream=self.arrivalStream)
 
         # schedule the closing event
         self.simCal.add_event(
@@ -72,20 +211,23 @@ class UrgentCareModel:
                                   urgent_care=self.urgentCare)
         )
 
-        # find the arrival time of the first patient
-        arrival_time = self.params.arrivalTimeDist.sample(rng=rng)
-
-        # find the depression status of the next patient
-        if_with_depression = False
-        if rng.random_sample() < self.params.probDepression:
-            if_with_depression = True
+        # schedule the end of the warm-up period and of the first batch
+        if self.warmUpPeriod > 0:
+            self.simCal.add_bookkeeping_event(
+                event=EndOfWarmUp(time=self.warmUpPeriod,
+                                  sim_outputs=self.simOutputs,
+                                  sim_cal=self.simCal)
+            )
+        if self.batchLength is not None:
+            self.simCal.add_bookkeeping_event(
+                event=EndOfBatch(time=self.warmUpPeriod + self.batchLength,
+                                 sim_outputs=self.simOutputs,
+                                 sim_cal=self.simCal,
+                                 batch_length=self.batchLength)
+            )
 
         # schedule the arrival of the first patient
-        self.simCal.add_event(
-            event=Arrival(time=arrival_time,
-                          patient=Patient(id=0, if_with_depression=if_with_depression),
-                          urgent_care=self.urgentCare)
-        )
+        self.urgentCare.schedule_arrival(patient_id=0, rng=rng)
 
     def print_trace(self):
         """ outputs trace """
@@ -94,9 +236,17 @@ class UrgentCareModel:
         self.trace.print_trace(filename='Trace-Replication' + str(self.id) + '.txt',
                                directory='Trace',
                                delete_existing_files=True)
-        # patient summary
-        write_csv(file_name='Patients-Replication' + str(self.id) + '.txt',
-                  rows=self.simOutputs.patientSummary,
-                  directory='Patients Summary',
-                  delete_existing_files=True)
+        # patient summary (only if the records of patients are kept)
+        if self.keepPatientRecords:
+            write_csv(file_name='Patients-Replication' + str(self.id) + '.txt',
+                      rows=self.simOutputs.patientSummary,
+                      directory='Patients Summary',
+                      delete_existing_files=True)
+
+    def export_outputs(self, dataset):
+        """ adds the patient records and sample paths of this replication to a binary dataset
+        :param dataset: (ReplicationDataset) dataset to write into
+        """
+
+        dataset.write_replication(id=self.id, sim_outputs=self.simOutputs)
 
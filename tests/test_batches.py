@@ -0,0 +1,26 @@
+import pytest
+
+import ModelParameters as P
+import UrgentCareModel as M
+
+
+def simulate(**options):
+    urgent_care_model = M.UrgentCareModel(id=7, parameters=P.Parameters(n_mhps=3), trace_on=False, **options)
+    urgent_care_model.simulate(sim_duration=1000)
+    return urgent_care_model
+
+
+@pytest.mark.parametrize('options', [{}, {'arrival_stream': True}])
+def test_batches_do_not_change_the_end_of_simulation(options):
+    # the end of the last batch is after the last departure, so it should not extend the run
+    model = simulate(sample_path_max_points=100, **options)
+    batch_model = simulate(batch_length=24, **options)
+
+    assert batch_model.simCal.time == model.simCal.time
+    assert batch_model.simOutputs.nPatientInSystem.get_mean() == pytest.approx(
+        model.simOutputs.nPatientInSystem.get_mean())
+    assert batch_model.simOutputs.nPCPBusy.get_mean() == pytest.approx(model.simOutputs.nPCPBusy.get_mean())
+
+    # the last batch is cut at the end of the simulation
+    assert len(batch_model.simOutputs.batchMeans) == 1
+    assert batch_model.simOutputs.get_batch_means('tEnd')[-1] == model.simCal.time
@@ -0,0 +1,27 @@
+import pytest
+
+import ModelEntities
+import ModelEvents
+from BenchmarkUrgentCare import get_class_with_dict, measure_allocation
+
+# functions that create the objects allocated for every patient
+CREATES = {
+    ModelEntities.Patient: lambda cls, i: cls(id=i, if_with_depression=False, exam_duration=0.1),
+    ModelEvents.Arrival: lambda cls, i: cls(time=i, patient=None, urgent_care=None),
+    ModelEvents.EndOfExam: lambda cls, i: cls(time=i, physician=None, urgent_care=None),
+    ModelEvents.EndOfMentalHealthConsult: lambda cls, i: cls(time=i, consult_room=None, urgent_care=None),
+}
+
+
+@pytest.mark.parametrize('cls', list(CREATES))
+def test_slotted_objects_use_less_memory(cls):
+    create = CREATES[cls]
+    cls_with_dict = get_class_with_dict(cls)
+
+    assert not hasattr(create(cls, 0), '__dict__')
+    assert hasattr(create(cls_with_dict, 0), '__dict__')
+
+    size, elapsed = measure_allocation(create=lambda i: create(cls, i), n_objects=10000)
+    size_with_dict, elapsed_with_dict = measure_allocation(create=lambda i: create(cls_with_dict, i),
+                                                           n_objects=10000)
+    assert size < size_with_dict
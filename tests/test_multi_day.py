@@ -0,0 +1,17 @@
+import pytest
+
+import ModelParameters as P
+from BatchUrgentCareModel import BatchUrgentCareModel
+
+
+def test_hours_open_cannot_exceed_hours_per_day_over_several_days():
+    with pytest.raises(ValueError):
+        P.Parameters(n_days=3, hours_open=30)
+
+    # a single day can be longer than hours per day
+    assert P.Parameters(n_days=1, hours_open=30).hoursOpen == 30
+
+
+def test_batch_model_rejects_several_days():
+    with pytest.raises(ValueError):
+        BatchUrgentCareModel(parameters=P.Parameters(n_days=2), n_replications=10).simulate()
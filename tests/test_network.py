@@ -0,0 +1,29 @@
+import InputData as D
+import ModelEntities
+import ModelParameters as P
+from ModelNetwork import UrgentCareNetworkModel
+
+
+def test_diverted_patients_are_served_at_the_rates_of_the_serving_site(monkeypatch):
+    # two urgent cares whose mean exam durations differ 60-fold: the first is overloaded and diverts patients
+    # to the second, and the mean exam duration of patients examined at each site should match its own mean
+    params = [P.Parameters(n_pcps=10, mean_exam_duration=1, mean_arrival_time=1 / 60),
+              P.Parameters(n_pcps=10, mean_exam_duration=1 / 60, mean_arrival_time=1 / 10)]
+
+    # exam durations of patients as they start their exam at each site
+    exam_durations = {i: [] for i in range(len(params))}
+    exam = ModelEntities.PCP.exam
+
+    def recording_exam(pcp, patient, rng):
+        exam_durations[pcp.urgentCare.id].append(patient.examDuration)
+        exam(pcp, patient, rng)
+
+    monkeypatch.setattr(ModelEntities.PCP, 'exam', recording_exam)
+
+    model = UrgentCareNetworkModel(id=1, site_parameters=params, neighbors={0: [1]}, diversion_threshold=5)
+    model.simulate(sim_duration=D.SIM_DURATION, n_processes=1)
+
+    assert sum(model.get_outcomes('nPatientsDiverted')) > 0
+    for i, durations in exam_durations.items():
+        mean = sum(durations) / len(durations)
+        assert abs(mean - params[i].meanExamDuration) < 0.2 * params[i].meanExamDuration
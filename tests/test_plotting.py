@@ -0,0 +1,26 @@
+import matplotlib
+import pytest
+
+import ModelParameters as P
+import SimulateUrgentCare as S
+import UrgentCareModel as M
+
+matplotlib.use('Agg')
+
+
+@pytest.mark.parametrize('options', [
+    {},
+    {'sample_path_max_points': 200},
+    {'warm_up_period': 8},
+    {'batch_length': 24},
+])
+def test_plot_outputs(options):
+    # runs with these options keep time-weighted sample paths, which deampy cannot plot directly
+    urgent_care_model = M.UrgentCareModel(id=1, parameters=P.Parameters(n_days=3), trace_on=False, **options)
+    urgent_care_model.simulate(sim_duration=1000)
+
+    import matplotlib.pyplot as plt
+    try:
+        S.plot_outputs(urgent_care_model=urgent_care_model)
+    finally:
+        plt.close('all')
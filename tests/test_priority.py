@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+import ModelParameters as P
+import UrgentCareModel as M
+
+
+def simulate(**options):
+    # an undersized urgent care so that many patients wait
+    urgent_care_model = M.UrgentCareModel(
+        id=1, parameters=P.Parameters(n_pcps=8, priority_probs=[0.2, 0.8]), trace_on=False, **options)
+    urgent_care_model.simulate(sim_duration=1000)
+    return urgent_care_model.simOutputs
+
+
+def test_priority_classes_are_served_first():
+    sim_outputs = simulate()
+    priorities = sim_outputs.patientRecords.get_column('priority')
+    waiting_times = sim_outputs.patientTimeInPCPWaitingRoom
+
+    assert set(priorities.tolist()) == {0, 1}
+    assert np.mean(priorities == 0) == pytest.approx(0.2, abs=0.05)
+    assert waiting_times[priorities == 0].mean() < 0.5 * waiting_times[priorities == 1].mean()
+
+
+def test_priority_classes_with_arrival_stream():
+    # the stream of pre-generated arrivals draws the same priority classes
+    sim_outputs = simulate()
+    stream_outputs = simulate(arrival_stream=True)
+
+    for name in ('id', 'priority', 'tLeft'):
+        assert np.array_equal(sim_outputs.patientRecords.get_column(name),
+                              stream_outputs.patientRecords.get_column(name))
@@ -0,0 +1,16 @@
+import os
+
+import ModelParameters as P
+import UrgentCareModel as M
+
+
+def test_print_trace_without_patient_records(tmp_path, monkeypatch):
+    # streaming statistics with the default trace setting
+    monkeypatch.chdir(tmp_path)
+    urgent_care_model = M.UrgentCareModel(id=1, parameters=P.Parameters(), trace_on=True,
+                                          keep_patient_records=False)
+    urgent_care_model.simulate(sim_duration=1000)
+    urgent_care_model.print_trace()
+
+    assert os.path.exists(os.path.join('Trace', 'Trace-Replication1.txt'))
+    assert not os.path.exists('Patients Summary')